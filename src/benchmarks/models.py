@@ -0,0 +1,141 @@
+"""Микробенчмарк моделей: slots-датаклассы против прежних pydantic-модели и
+датаклассов с __dict__.
+
+Запуск из src/:
+    python -m benchmarks.models --count 100000
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from pydantic import BaseModel, Field
+
+from parsers.tournaments_parser import TournamentParseResult
+from utils import models
+from utils.models import Player, PlayerResult
+
+
+class LegacyTournamentParseResult(BaseModel):
+    id: int = Field(description='Tournament ID')
+    datetime: str = Field(description='Tournament datetime')
+    name: str = Field(str, description='Name of the tournament')
+    players: str = Field(int, description='Players participating in the tournament')
+    rating: str | None = Field(int, description='Mean rating of the tournament')
+    type: str = Field(int | None, description='Max rating')
+
+
+@dataclass
+class LegacyPlayer:
+    id: int
+    name: str
+    nickname: str | None = None
+    rating: int | None = None
+    city: str | None = None
+    hand: str | None = None
+
+    def __post_init__(self):
+        if not isinstance(self.id, int):
+            raise TypeError(
+                f'Invalid type for id: expected int, got {type(self.id).__name__}'
+            )
+
+
+@dataclass
+class LegacyPlayerResult:
+    player_id: int
+    name: str
+    rating_before: float
+    rating_delta: float
+    rating_after: float
+    games_won: int
+    games_lost: int
+
+
+def make_tournament_row(cls: type) -> Callable[[int], object]:
+    def factory(i: int) -> object:
+        return cls(
+            id=i,
+            datetime='2025-04-12 10:00',
+            name='Турнир',
+            players='24',
+            rating='512',
+            type='до 600',
+        )
+
+    return factory
+
+
+def make_player(cls: type) -> Callable[[int], object]:
+    return lambda i: cls(i, 'Иванов Иван', rating=500, city='Москва')
+
+
+def make_player_result(cls: type) -> Callable[[int], object]:
+    return lambda i: cls(i, 'Иванов Иван', 500.0, 4.5, 504.5, 3, 1)
+
+
+CASES: dict[str, tuple[Callable[[int], object], Callable[[int], object]]] = {
+    'tournament row': (
+        make_tournament_row(LegacyTournamentParseResult),
+        make_tournament_row(TournamentParseResult),
+    ),
+    'player': (make_player(LegacyPlayer), make_player(Player)),
+    'player result': (
+        make_player_result(LegacyPlayerResult),
+        make_player_result(PlayerResult),
+    ),
+}
+
+
+def measure(
+    factory: Callable[[int], object], count: int, rounds: int
+) -> tuple[float, float]:
+    """Возвращает (мкс на объект, байт на объект), время - лучшее из rounds"""
+    elapsed = float('inf')
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for i in range(count):
+                factory(i)
+            elapsed = min(elapsed, time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    # Объекты держатся в списке, чтобы мерить занятую ими память
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return elapsed / count * 1e6, size / count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Models microbenchmark')
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"case":<32}{"us/obj":>10}{"bytes/obj":>12}')
+    for name, (legacy, current) in CASES.items():
+        rows = [
+            (f'{name} (legacy)', legacy),
+            (name, current),
+        ]
+        for row_name, factory in rows:
+            us, size = measure(factory, args.count, args.rounds)
+            print(f'{row_name:<32}{us:>10.2f}{size:>12.0f}')
+        models.VALIDATE = False
+        us, size = measure(current, args.count, args.rounds)
+        models.VALIDATE = True
+        print(f'{name + " (no validation)":<32}{us:>10.2f}{size:>12.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
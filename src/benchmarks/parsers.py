@@ -0,0 +1,229 @@
+"""Бенчмарк парсеров на сохранённых страницах из htmls/ и синтетических
+страницах в --scale раз больше настоящих (см. benchmarks.synthetic_pages).
+
+Запуск из src/:
+    python -m benchmarks.parsers            # прогон и печать результатов
+    python -m benchmarks.parsers --save     # записать базовую линию
+    python -m benchmarks.parsers --check    # exit 1, если хуже базовой линии
+
+Базовая линия зависит от машины, её нужно перезаписывать на той же машине,
+где потом запускается --check.
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from benchmarks.synthetic_pages import SyntheticPages, TournamentState
+from parsers.parser import Parser
+from parsers.player_parser import PlayerParser
+from parsers.players_parser import PlayersParser
+from parsers.tournament_parser import TournamentParser
+from parsers.tournaments_parser import TournamentsParser
+from utils.custom_logger import logger
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines', 'parsers.json')
+# Насколько можно отстать от базовой линии, доля
+DEFAULT_THRESHOLD = 0.25
+
+
+def read_pages(pattern: str) -> list[str]:
+    pages = []
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+@dataclass
+class Case:
+    name: str
+    parser: type[Parser]
+    pages: list[str]
+
+
+@dataclass
+class CaseResult:
+    pages_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_kb: float
+
+
+def get_cases(scale: int) -> list[Case]:
+    tournament_pages = read_pages('htmls/**/tournament/*.html') + read_pages(
+        'htmls/2024-11-02/*_p*.html'
+    )
+    tournaments_pages = read_pages('htmls/**/tournaments/*.html')
+    player_pages = read_pages('htmls/**/player/*.html') + read_pages(
+        'htmls/2024-11-02/player_num_one.html'
+    )
+    players_pages = read_pages('htmls/**/players/*.html')
+
+    # На настоящих страницах десятки игроков и ~50 турниров в день
+    synthetic = SyntheticPages(seed=0)
+    day = datetime.date(2025, 4, 12)
+    synthetic_tournament_pages = [
+        synthetic.tournament_page(
+            1, TournamentState.COMPLETED, registered=16 * scale, forecasts=5 * scale
+        ),
+        synthetic.tournament_page(
+            2, TournamentState.UPCOMING, registered=20 * scale, refused=2 * scale
+        ),
+        synthetic.tournament_page(
+            3, TournamentState.ONLINE, registered=20 * scale, refused=2 * scale
+        ),
+    ]
+    synthetic_tournaments_pages = [
+        synthetic.tournaments_page(day, day, per_day=10 * scale, limit=None),
+        synthetic.tournaments_page(day - datetime.timedelta(days=5), day, per_day=50),
+    ]
+    return [
+        Case('tournament', TournamentParser, tournament_pages),
+        Case(f'tournament_x{scale}', TournamentParser, synthetic_tournament_pages),
+        Case('tournaments', TournamentsParser, tournaments_pages),
+        Case(f'tournaments_x{scale}', TournamentsParser, synthetic_tournaments_pages),
+        Case('player', PlayerParser, player_pages),
+        Case('players', PlayersParser, players_pages),
+        Case(
+            f'players_x{scale}', PlayersParser, [synthetic.players_page(30 * scale)]
+        ),
+    ]
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+def run_case(case: Case, rounds: int) -> CaseResult:
+    # Прогрев: импорты, кэши bs4
+    for page in case.pages:
+        case.parser.parse_data(page)
+
+    latencies = []
+    for _ in range(rounds):
+        for page in case.pages:
+            start = time.perf_counter()
+            case.parser.parse_data(page)
+            latencies.append(time.perf_counter() - start)
+
+    # Память меряется отдельным проходом: tracemalloc сильно замедляет парсинг
+    peak = 0
+    for page in case.pages:
+        tracemalloc.start()
+        case.parser.parse_data(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return CaseResult(
+        pages_per_sec=len(latencies) / sum(latencies),
+        p50_ms=percentile(latencies, 50) * 1000,
+        p95_ms=percentile(latencies, 95) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+        peak_kb=peak / 1024,
+    )
+
+
+def run(cases: list[Case], rounds: int) -> dict[str, CaseResult]:
+    return {case.name: run_case(case, rounds) for case in cases}
+
+
+def find_regressions(
+    results: dict[str, CaseResult],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """Сравнивает прогон с базовой линией, возвращает описания регрессий"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result.pages_per_sec < base['pages_per_sec'] * (1 - threshold):
+            regressions.append(
+                f'{name}: {result.pages_per_sec:.1f} pages/s, '
+                f'baseline {base["pages_per_sec"]:.1f}'
+            )
+        for metric in ('p95_ms', 'peak_kb'):
+            value = getattr(result, metric)
+            if value > base[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {value:.1f}, baseline {base[metric]:.1f}'
+                )
+    return regressions
+
+
+def print_results(results: dict[str, CaseResult]) -> None:
+    print(
+        f'{"case":<18}{"pages/s":>10}{"p50 ms":>10}{"p95 ms":>10}'
+        f'{"p99 ms":>10}{"peak KB":>10}'
+    )
+    for name, r in results.items():
+        print(
+            f'{name:<18}{r.pages_per_sec:>10.1f}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}'
+            f'{r.p99_ms:>10.2f}{r.peak_kb:>10.0f}'
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Parsers benchmark')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=10, help='Row multiplier')
+    parser.add_argument('--save', action='store_true', help='Save results as baseline')
+    parser.add_argument('--check', action='store_true', help='Fail on regression')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    # Парсеры пишут лог на каждую страницу, вывод мешает замерам
+    logger.setLevel(logging.ERROR)
+    results = run(get_cases(args.scale), args.rounds)
+    print_results(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(
+                {
+                    'machine': {
+                        'platform': platform.platform(),
+                        'python': platform.python_version(),
+                        'cpu_count': os.cpu_count(),
+                        'html_parser': Parser.get_backend(),
+                    },
+                    'cases': {
+                        name: {k: round(v, 2) for k, v in asdict(r).items()}
+                        for name, r in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+        print(f'Baseline saved to {args.baseline}')
+
+    if args.check:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['cases']
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print('Regressions:')
+            print('\n'.join(regressions))
+            return 1
+        print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Симулятор расписания обновлений турниров: прогоняет историю изменений
+страниц через политики из services.refresh_policy и сравнивает, сколько
+запросов к RTTF они тратят и с какой задержкой замечают изменения у турниров,
+за участниками которых кто-то следит.
+
+История - JSON со списком турниров (см. TournamentHistory), по умолчанию
+генерируется детерминированно.
+
+Запуск из src/:
+    python -m benchmarks.refresh_simulator
+    python -m benchmarks.refresh_simulator --days 14 --budget 300
+    python -m benchmarks.refresh_simulator --history history.json
+"""
+
+import argparse
+import datetime
+import json
+import random
+import statistics
+import sys
+from dataclasses import dataclass, field
+
+from services.refresh_policy import (
+    REFRESH_POLICIES,
+    RefreshPolicy,
+    RefreshSignals,
+    get_refresh_limit,
+    get_refresh_policy,
+    update_change_rate,
+)
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M'
+
+
+@dataclass
+class TournamentHistory:
+    id: int
+    start: datetime.datetime
+    # Когда на странице появляются результаты
+    completed_at: datetime.datetime
+    # Когда турнир попадает в базу из списка турниров
+    discovered_at: datetime.datetime
+    watchers: int
+    # Моменты изменений страницы: записи, снятия, результаты
+    changes: list[datetime.datetime]
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'start': self.start.strftime(DATETIME_FORMAT),
+            'completed_at': self.completed_at.strftime(DATETIME_FORMAT),
+            'discovered_at': self.discovered_at.strftime(DATETIME_FORMAT),
+            'watchers': self.watchers,
+            'changes': [change.strftime(DATETIME_FORMAT) for change in self.changes],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TournamentHistory':
+        def parse(value):
+            return datetime.datetime.strptime(value, DATETIME_FORMAT)
+
+        return cls(
+            id=data['id'],
+            start=parse(data['start']),
+            completed_at=parse(data['completed_at']),
+            discovered_at=parse(data['discovered_at']),
+            watchers=data['watchers'],
+            changes=sorted(map(parse, data['changes'])),
+        )
+
+
+def generate_history(
+    seed: int, start: datetime.datetime, days: int, per_day: int
+) -> list[TournamentHistory]:
+    """Турниры с 9 до 21 часа, записи за 5 дней до начала, результаты через
+    3-5 часов после. За участниками примерно каждого пятого турнира следят"""
+    rng = random.Random(seed)
+    history = []
+    for day in range(days):
+        for number in range(per_day):
+            tournament_start = start + datetime.timedelta(
+                days=day, hours=rng.randint(9, 21), minutes=rng.choice((0, 30))
+            )
+            discovered_at = max(start, tournament_start - datetime.timedelta(days=5))
+            # Время с точностью до минуты, как в JSON истории
+            completed_at = tournament_start + datetime.timedelta(
+                minutes=rng.randint(180, 300)
+            )
+            registration_window = int(
+                (tournament_start - discovered_at).total_seconds() // 60
+            )
+            changes = sorted(
+                discovered_at
+                + datetime.timedelta(minutes=rng.randint(0, registration_window))
+                for _ in range(rng.randint(0, 30))
+            )
+            changes.append(completed_at)
+            history.append(
+                TournamentHistory(
+                    id=day * per_day + number,
+                    start=tournament_start,
+                    completed_at=completed_at,
+                    discovered_at=discovered_at,
+                    watchers=rng.choice((1, 2, 3)) if rng.random() < 0.2 else 0,
+                    changes=changes,
+                )
+            )
+    return history
+
+
+@dataclass
+class TournamentState:
+    history: TournamentHistory
+    next_update: datetime.datetime | None
+    priority: float | None = None
+    change_rate: float | None = None
+    last_update: datetime.datetime | None = None
+    # Сколько изменений из history.changes уже замечено
+    seen: int = 0
+
+
+@dataclass
+class SimulationResult:
+    requests: int = 0
+    # Задержки обнаружения изменений у турниров с подписчиками, минуты
+    delays: list[float] = field(default_factory=list)
+    missed: int = 0
+
+    def summary(self) -> dict[str, float]:
+        delays = self.delays or [0.0]
+        return {
+            'requests': self.requests,
+            'watched_changes': len(self.delays),
+            'missed': self.missed,
+            'delay_p50_min': statistics.median(delays),
+            'delay_p95_min': (
+                statistics.quantiles(delays, n=20)[-1]
+                if len(delays) > 1
+                else delays[0]
+            ),
+        }
+
+
+def simulate(
+    history: list[TournamentHistory],
+    policy: RefreshPolicy,
+    budget_per_hour: int,
+    batch_size: int = 25,
+    tick: datetime.timedelta = datetime.timedelta(minutes=5),
+) -> SimulationResult:
+    """Повторяет PlayerService.process_batch_and_notify: каждый тик крон
+    берёт просроченные турниры (новые первыми, дальше по приоритету) в
+    пределах батча и часового бюджета"""
+    result = SimulationResult()
+    pending = sorted(history, key=lambda h: h.discovered_at)
+    states: list[TournamentState] = []
+    recent_requests: list[datetime.datetime] = []
+    now = min(h.discovered_at for h in history)
+    end = max(h.start for h in history) + datetime.timedelta(days=3)
+
+    while now <= end:
+        while pending and pending[0].discovered_at <= now:
+            states.append(TournamentState(pending.pop(0), next_update=now))
+
+        recent_requests = [
+            moment
+            for moment in recent_requests
+            if moment > now - datetime.timedelta(hours=1)
+        ]
+        # Каждая обработка - событие бюджета, как DBRefreshEvent
+        limit = get_refresh_limit(batch_size, budget_per_hour, len(recent_requests))
+        expired = [
+            state
+            for state in states
+            if state.next_update is not None and state.next_update <= now
+        ]
+        expired.sort(
+            key=lambda state: (
+                state.priority is not None,
+                -(state.priority or 0),
+                state.next_update,
+            )
+        )
+        for state in expired[:limit]:
+            refresh(state, policy, now, result)
+            recent_requests.append(now)
+        now += tick
+
+    for state in states:
+        if state.history.watchers:
+            result.missed += len(state.history.changes) - state.seen
+    return result
+
+
+def refresh(
+    state: TournamentState,
+    policy: RefreshPolicy,
+    now: datetime.datetime,
+    result: SimulationResult,
+) -> None:
+    result.requests += 1
+    history = state.history
+    seen = state.seen
+    while seen < len(history.changes) and history.changes[seen] <= now:
+        if history.watchers:
+            delay = (now - history.changes[seen]).total_seconds() / 60
+            result.delays.append(delay)
+        seen += 1
+    changed = seen > state.seen or state.last_update is None
+    state.seen = seen
+    state.last_update = now
+    state.change_rate = update_change_rate(state.change_rate, changed)
+
+    scheduled = policy.schedule(
+        RefreshSignals(
+            now=now,
+            start=history.start,
+            watchers=history.watchers,
+            change_rate=state.change_rate,
+            is_completed=(now >= history.completed_at) if changed else None,
+        )
+    )
+    state.priority = scheduled.priority
+    state.next_update = (
+        None
+        if scheduled.next_update_dtm is None
+        else datetime.datetime.fromtimestamp(scheduled.next_update_dtm)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Refresh policies simulator')
+    parser.add_argument('--history', help='JSON with tournaments history')
+    parser.add_argument('--save-history', help='Save generated history to JSON')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--per-day', type=int, default=50)
+    parser.add_argument('--budget', type=int, default=600, help='Refreshes per hour')
+    parser.add_argument('--batch-size', type=int, default=25)
+    parser.add_argument('--tick', type=int, default=5, help='Cron period, minutes')
+    args = parser.parse_args()
+
+    if args.history:
+        with open(args.history, 'r') as f:
+            history = [TournamentHistory.from_dict(item) for item in json.load(f)]
+    else:
+        history = generate_history(
+            args.seed, datetime.datetime(2025, 4, 1), args.days, args.per_day
+        )
+    if args.save_history:
+        with open(args.save_history, 'w') as f:
+            json.dump([item.to_dict() for item in history], f, indent=2)
+
+    print(
+        f'{"policy":<10}{"requests":>10}{"changes":>10}{"missed":>8}'
+        f'{"p50 min":>10}{"p95 min":>10}'
+    )
+    for name in REFRESH_POLICIES:
+        summary = simulate(
+            history,
+            get_refresh_policy(name),
+            args.budget,
+            batch_size=args.batch_size,
+            tick=datetime.timedelta(minutes=args.tick),
+        ).summary()
+        print(
+            f'{name:<10}{summary["requests"]:>10}{summary["watched_changes"]:>10}'
+            f'{summary["missed"]:>8}{summary["delay_p50_min"]:>10.1f}'
+            f'{summary["delay_p95_min"]:>10.1f}'
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
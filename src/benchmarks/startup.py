@@ -0,0 +1,90 @@
+"""Время старта режимов main.py: сколько занимает импорт всего, что нужно
+режиму, в новом процессе (как при запуске из крона).
+
+Каждый замер - отдельный процесс python. Процессы запускаются во временной
+папке, чтобы логгер не оставлял файлы в logs/.
+
+Запуск из src/:
+    python -m benchmarks.startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Что импортирует каждый режим main.py сверх самого main. Должно совпадать
+# с импортами внутри функций режимов
+MODES: dict[str, list[str]] = {
+    'python': [],
+    'main --help': ['main'],
+    '--parse-tournaments': ['main', 'clients.page_cache', 'services.player_service'],
+    '--process-tournaments-batch': ['main', 'services.player_service'],
+    '--worker': [
+        'main',
+        'clients.page_cache',
+        'services.player_service',
+        'services.worker',
+    ],
+    'bot': ['main', 'bot.bot_setup'],
+}
+
+CHILD_CODE = '''
+import json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+print(json.dumps({{
+    'import_ms': (time.perf_counter() - start) * 1000,
+    'modules': len(sys.modules),
+    'sqlalchemy': 'sqlalchemy' in sys.modules,
+    'telebot': 'telebot' in sys.modules,
+}}))
+'''
+
+
+def measure(modules: list[str], cwd: str) -> dict:
+    env = {**os.environ, 'PYTHONPATH': SRC_DIR}
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE.format(modules=modules)],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    total_ms = (time.perf_counter() - start) * 1000
+    return {**json.loads(output.strip().splitlines()[-1]), 'total_ms': total_ms}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Startup time per main.py mode')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f'{"mode":<30}{"import ms":>10}{"total ms":>10}{"modules":>9}'
+        f'{"sqlalchemy":>12}{"telebot":>9}'
+    )
+    with tempfile.TemporaryDirectory() as cwd:
+        for mode, modules in MODES.items():
+            runs = [measure(modules, cwd) for _ in range(args.runs)]
+            print(
+                f'{mode:<30}'
+                f'{statistics.median(r["import_ms"] for r in runs):>10.0f}'
+                f'{statistics.median(r["total_ms"] for r in runs):>10.0f}'
+                f'{runs[0]["modules"]:>9}'
+                f'{str(runs[0]["sqlalchemy"]):>12}{str(runs[0]["telebot"]):>9}'
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""Генератор синтетических страниц m.rttf.ru для нагрузочных тестов.
+
+Страницы повторяют разметку настоящих (см. htmls/): те же секции, классы
+таблиц и ссылки, которые читают парсеры и отпечаток страницы турнира.
+Содержимое задаётся seed'ом, одинаковые параметры дают одинаковый html.
+
+Запуск из src/, сохраняет набор страниц в каталог:
+    python -m benchmarks.synthetic_pages out/ --tournaments 100 --players 200
+"""
+
+import argparse
+import datetime
+import os
+import random
+from enum import Enum
+
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов',
+    'Михайлов', 'Новиков', 'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев',
+]  # fmt: skip
+INITIALS = 'АБВГДЕИКЛМНОПРСТ'
+CITIES = ['Москва', 'Санкт-Петербург', 'Казань', 'Рузаевка', 'Тверь', 'Химки']
+CLUBS = ['ArtTT-Первом', 'TT Planet', 'СКМ Лужники', 'Лига ПРО', 'POINT']
+WEEKDAYS = ['понедельник', 'вторник', 'среда', 'четверг', 'пятница', 'суббота',
+            'воскресенье']  # fmt: skip
+TABS = 'tour-desc,tour-forecasts,tour-online,tour-tables,tour-results'
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+  <base href="/">
+  <meta charset="UTF-8">
+  <title>{title} — RTTF.ru</title>
+</head>
+<body>
+<header>
+    <a href="https://rttf.ru/?fullver={fullver}" rel="nofollow">Полная версия</a>
+</header>
+<main>
+{content}
+</main>
+</body></html>
+"""
+
+
+class TournamentState(Enum):
+    UPCOMING = 'upcoming'  # Идёт регистрация
+    ONLINE = 'online'  # Идёт турнир, есть промежуточные результаты
+    COMPLETED = 'completed'  # Есть итоговые результаты
+
+
+class SyntheticPages:
+    """Генератор страниц. Все случайные значения берутся из random.Random(seed)"""
+
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+
+    def _player_ids(self, count: int) -> list[int]:
+        return self.random.sample(range(1000, 1000 + max(count * 20, 1000)), count)
+
+    def _player_name(self) -> str:
+        return f'{self.random.choice(LAST_NAMES)} {self.random.choice(INITIALS)}'
+
+    def _registration_table(self, player_ids: list[int], css_class: str) -> str:
+        rows = []
+        for number, player_id in enumerate(player_ids, start=1):
+            rows.append(
+                f"""      <tr onclick="location='/players/{player_id}';">
+        <td>{number}</td>
+        <td><a href="players/{player_id}">{self._player_name()}</a></td>
+        <td><dfn>{self.random.randint(100, 700)}</dfn></td>
+        <td data-sort="20250412215653">12.04.2025 21:56</td>
+      </tr>"""
+            )
+        return f"""<table class="{css_class}">
+    <thead>
+    <tr>
+      <th>№</th>
+      <th>игрок</th>
+      <th data-sort-method="number"><dfn></dfn></th>
+      <th>дата заявки</th>
+    </tr>
+    </thead>
+    <tbody>
+{''.join(rows)}</tbody></table>"""
+
+    def _results_table(self, player_ids: list[int]) -> str:
+        rows = []
+        for place, player_id in enumerate(player_ids, start=1):
+            rating_before = self.random.randint(100, 700)
+            delta = self.random.randint(-150, 150) / 10
+            delta_str = f'+{delta}' if delta >= 0 else f'&#8722;{abs(delta)}'
+            won = self.random.randint(0, 7)
+            lost = self.random.randint(0, 7)
+            rows.append(
+                f"""    <tr>
+    <td data-sort="{place}">{place}</td>
+    <td><a href="players/{player_id}">{self._player_name()}</a></td>
+    <td><dfn>{rating_before}</dfn></td>
+    <td class="{'plus' if delta >= 0 else 'minus'}" data-sort="{delta}">{delta_str}</td>
+    <td><dfn>{round(rating_before + delta)}</dfn></td>
+    <td>{won + lost} ({won}-{lost})</td>
+    <td>{(won + lost) * 3} ({won * 3}-{lost * 3})</td>
+  </tr>"""
+            )
+        return f"""<table class="tablesort tour-players">
+  <thead>
+  <tr>
+    <th>м</th>
+    <th>игрок</th>
+    <th><dfn></dfn>до</th>
+    <th>+\\-</th>
+    <th><dfn></dfn></th>
+    <th data-sort-method="number">игры</th>
+    <th>сеты</th>
+  </tr>
+  </thead>
+  <tbody>
+{''.join(rows)}
+</tbody>
+</table>"""
+
+    def _forecasts_table(self, player_ids: list[int], count: int) -> str:
+        rows = []
+        for number in range(1, count + 1):
+            forecast = ''.join(
+                f'<div>{place}. '
+                f'<a href="players/{player_id}">{self._player_name()}</a></div>'
+                for place, player_id in enumerate(
+                    self.random.sample(player_ids, min(3, len(player_ids))), start=1
+                )
+            )
+            author_id = self.random.randint(1000, 200000)
+            rows.append(
+                f"""      <tr>
+        <td>{number}</td>
+        <td><a href="players/{author_id}">{self._player_name()}</a></td>
+        <td>{forecast}</td>
+        <td>{self.random.randint(0, 5)}</td>
+        <td data-sort="20250412141045">12.04.2025 14:10</td>
+      </tr>"""
+            )
+        return f"""<h2>Список прогнозов</h2><table class="tablesort">
+    <thead>
+    <tr>
+      <th>№</th>
+      <th>предсказатель</th>
+      <th>прогноз</th>
+      <th>очки</th>
+      <th>дата прогноза</th>
+    </tr>
+    </thead>
+    <tbody>
+{''.join(rows)}</tbody></table>"""
+
+    def tournament_page(
+        self,
+        tournament_id: int,
+        state: TournamentState = TournamentState.COMPLETED,
+        registered: int = 20,
+        refused: int = 0,
+        forecasts: int = 5,
+        start: datetime.datetime = datetime.datetime(2025, 4, 12, 14, 0),
+    ) -> str:
+        """Страница турнира /tournaments/<id>.
+
+        registered - число игроков в таблице записавшихся (для завершённого
+        турнира - в таблице результатов), refused - снявшихся (не бывает у
+        завершённых).
+        """
+        player_ids = self._player_ids(registered + refused)
+        registered_ids, refused_ids = player_ids[:registered], player_ids[registered:]
+        club = self.random.choice(CLUBS)
+        max_rating = self.random.choice([180, 250, 300, 350, 600, 800])
+
+        tabs = [
+            '<li data-tab="tour-desc">инфо</li>',
+            '<li data-tab="tour-forecasts">прогнозы</li>',
+        ]
+        if state == TournamentState.ONLINE:
+            tabs.append('<li class="act" data-tab="tour-online">онлайн</li>')
+        if state == TournamentState.COMPLETED:
+            tabs.append('<li class="act" data-tab="tour-results">результаты</li>')
+
+        desc = (
+            f'<p><var>{max_rating}</var> - ограничение по рейтингу</p>'
+            f'<p><kbd>{registered}/{registered + 8}</kbd> - заявилось '
+            f'{registered} чел.</p>'
+        )
+        if state != TournamentState.COMPLETED:
+            desc += self._registration_table(registered_ids, 'tablesort')
+            if refused_ids:
+                desc += (
+                    '<a href="javascript:;">показать список снявшихся</a>'
+                    + self._registration_table(refused_ids, 'tablesort hide')
+                )
+
+        sections = [
+            f"""<section class="tour-header">
+    <h1><time>{start:%d.%m.%Y %H:%M}</time> <var>{max_rating}</var> {club}</h1>
+    <h3>{club}. Лига {max_rating}</h3>
+    <ul id="tabs" data-tabs="{TABS}">
+      {''.join(tabs)}    </ul>
+  </section>""",
+            f'<section class="tour-desc">{desc}</section>',
+            f'<section class="tour-forecasts" hidden>'
+            f'{self._forecasts_table(registered_ids, forecasts)}</section>',
+        ]
+        if state == TournamentState.ONLINE:
+            sections.append(
+                '<section class="tour-online"><h2>Промежуточные результаты</h2>'
+                f'{self._results_table(registered_ids)}</section>'
+            )
+        if state == TournamentState.COMPLETED:
+            sections.append(
+                f'<section class="tour-results"><p>Участников: <b>{registered}</b></p>'
+                f'{self._results_table(registered_ids)}</section>'
+            )
+        return PAGE_TEMPLATE.format(
+            title=f'{club} - турнир',
+            fullver=f'%2Ftournaments%2F{tournament_id}',
+            content='\n'.join(sections),
+        )
+
+    def tournaments_page(
+        self,
+        date_from: datetime.date,
+        date_to: datetime.date,
+        per_day: int = 50,
+        first_id: int = 100000,
+        limit: int | None = 100,
+    ) -> str:
+        """Список турниров /tournaments/?date_from=...&date_to=...
+
+        Как на сайте: дни от поздних к ранним, не больше limit турниров
+        (остальное отбрасывается), "итого" только у списка за один день.
+        id турниров идут подряд от first_id в хронологическом порядке.
+        """
+        rows = []
+        shown = 0
+        days = (date_to - date_from).days + 1
+        for day_offset in reversed(range(days)):
+            if limit is not None and shown >= limit:
+                break
+            day = date_from + datetime.timedelta(days=day_offset)
+            rows.append(
+                f'<tr class="date"><th colspan="3">{day:%d.%m.%Y} / '
+                f'{WEEKDAYS[day.weekday()]}</th><td colspan="4"></td></tr>'
+            )
+            for number in reversed(range(per_day)):
+                if limit is not None and shown >= limit:
+                    break
+                tournament_id = first_id + day_offset * per_day + number
+                minutes = 9 * 60 + number * (14 * 60 // max(per_day, 1))
+                is_reg = self.random.random() < 0.5
+                players = self.random.randint(0, 24)
+                row_class = ' class="reg"' if is_reg else ''
+                onclick = f"location='/tournaments/{tournament_id}';"
+                rows.append(
+                    f"""<tr{row_class} onclick="{onclick}">
+    <td>{minutes // 60:02d}:{minutes % 60:02d}</td>
+    <td><var>{self.random.choice([180, 250, 300, 350, 600, 800])}</var></td>
+    <td><a href="tournaments/{tournament_id}">{self.random.choice(CLUBS)}</a></td>
+    <td><dfn>{self.random.randint(100, 700)}</dfn></td>
+    <td><kbd>{f'{players}/24' if is_reg else players}</kbd></td>
+    <td></td>
+    <td></td>
+  </tr>"""
+                )
+                shown += 1
+        if days == 1:
+            rows.append(
+                f"""<tr>
+          <td></td>
+          <td></td>
+          <td>итого: {shown}</td>
+          <td></td>
+          <td></td>
+          <td></td>
+          <td></td>
+        </tr>"""
+            )
+        content = f"""<section class="tours-list">
+    <table>
+      <tr>
+        <th></th>
+        <th></th>
+        <th></th>
+        <th title="средний рейтинг игроков на турнире"><dfn></dfn>сред.</th>
+        <th><kbd></kbd></th>
+        <th>игр</th>
+        <th><samp></samp></th>
+      </tr>
+      {''.join(rows)}    </table>
+</section>"""
+        return PAGE_TEMPLATE.format(
+            title='Турниры по настольному теннису',
+            fullver='%2Ftournaments%2F',
+            content=content,
+        )
+
+    def players_page(self, count: int = 30) -> str:
+        """Результаты поиска игроков /players/?name=..."""
+        rows = []
+        for player_id in self._player_ids(count):
+            rows.append(
+                f"""
+    <tr>
+    <td>{self.random.randint(1, 50000)}</td>
+    <td><a href="players/{player_id}">{self._player_name()}</a></td>
+    <td><a href="players/?cities[]=1229">{self.random.choice(CITIES)}</a></td>
+    <td><dfn>{self.random.randint(100, 700)}</dfn></td>
+    </tr>"""
+            )
+        content = f"""<section class="players-list rat_s">
+  <table>
+    <tr>
+      <th>М</th>
+      <th>имя</th>
+      <th>город</th>
+      <th><dfn></dfn> &#9207;</th>
+    </tr>
+{''.join(rows)}
+  </table>
+</section>"""
+        return PAGE_TEMPLATE.format(
+            title='Рейтинг игроков', fullver='%2Fplayers%2F', content=content
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic RTTF pages')
+    parser.add_argument('out_dir')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tournaments', type=int, default=10, help='Pages per state')
+    parser.add_argument(
+        '--players', type=int, default=20, help='Players per tournament'
+    )
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--per-day', type=int, default=50)
+    args = parser.parse_args()
+
+    pages = SyntheticPages(args.seed)
+    for sub_dir in ('tournament', 'tournaments', 'players'):
+        os.makedirs(os.path.join(args.out_dir, sub_dir), exist_ok=True)
+
+    def write(path: str, page: str):
+        with open(os.path.join(args.out_dir, path), 'w', encoding='utf-8') as f:
+            f.write(page)
+
+    tournament_id = 100000
+    for state in TournamentState:
+        for _ in range(args.tournaments):
+            refused = 0 if state == TournamentState.COMPLETED else args.players // 10
+            page = pages.tournament_page(
+                tournament_id, state, registered=args.players, refused=refused
+            )
+            write(f'tournament/{tournament_id}.html', page)
+            tournament_id += 1
+    date_from = datetime.date(2025, 4, 10)
+    date_to = date_from + datetime.timedelta(days=args.days - 1)
+    write(
+        'tournaments/range.html',
+        pages.tournaments_page(date_from, date_to, per_day=args.per_day),
+    )
+    write(
+        'tournaments/day.html',
+        pages.tournaments_page(date_from, date_from, per_day=args.per_day),
+    )
+    write('players/search.html', pages.players_page(args.players))
+
+
+if __name__ == '__main__':
+    main()
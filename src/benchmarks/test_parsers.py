@@ -0,0 +1,17 @@
+from benchmarks.parsers import CaseResult, find_regressions
+
+
+def test_find_regressions():
+    baseline = {
+        'case': {'pages_per_sec': 100.0, 'p95_ms': 10.0, 'peak_kb': 1000.0}
+    }
+    ok = CaseResult(
+        pages_per_sec=90.0, p50_ms=5.0, p95_ms=11.0, p99_ms=20.0, peak_kb=1100.0
+    )
+    assert find_regressions({'case': ok}, baseline, threshold=0.25) == []
+
+    slow = CaseResult(
+        pages_per_sec=50.0, p50_ms=5.0, p95_ms=30.0, p99_ms=40.0, peak_kb=1000.0
+    )
+    regressions = find_regressions({'case': slow, 'new': slow}, baseline, 0.25)
+    assert len(regressions) == 2
@@ -0,0 +1,33 @@
+import datetime
+
+from benchmarks.refresh_simulator import (
+    TournamentHistory,
+    generate_history,
+    simulate,
+)
+from services.refresh_policy import AdaptiveRefreshPolicy, FixedRefreshPolicy
+
+
+def test_history_round_trip():
+    history = generate_history(1, datetime.datetime(2025, 4, 1), days=1, per_day=3)
+    assert [TournamentHistory.from_dict(h.to_dict()) for h in history] == history
+
+
+def test_adaptive_policy_is_cheaper():
+    history = generate_history(0, datetime.datetime(2025, 4, 1), days=3, per_day=20)
+    fixed = simulate(history, FixedRefreshPolicy(), budget_per_hour=0).summary()
+    adaptive = simulate(history, AdaptiveRefreshPolicy(), budget_per_hour=0).summary()
+    assert fixed['missed'] == adaptive['missed'] == 0
+    assert adaptive['requests'] < fixed['requests']
+    assert adaptive['delay_p50_min'] < fixed['delay_p50_min']
+
+
+def test_budget_limits_requests():
+    history = generate_history(0, datetime.datetime(2025, 4, 1), days=1, per_day=50)
+    result = simulate(history, FixedRefreshPolicy(), budget_per_hour=10)
+    hours = (
+        max(h.start for h in history)
+        + datetime.timedelta(days=3)
+        - min(h.discovered_at for h in history)
+    ).total_seconds() / 3600
+    assert result.requests <= 10 * (hours + 1)
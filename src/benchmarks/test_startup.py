@@ -0,0 +1,12 @@
+import tempfile
+
+from benchmarks.startup import MODES, measure
+
+
+def test_modes_load_only_what_they_use():
+    with tempfile.TemporaryDirectory() as cwd:
+        help_mode = measure(MODES['main --help'], cwd)
+        batch_mode = measure(MODES['--process-tournaments-batch'], cwd)
+    assert not help_mode['sqlalchemy']
+    assert not help_mode['telebot']
+    assert not batch_mode['telebot']
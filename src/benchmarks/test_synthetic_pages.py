@@ -0,0 +1,57 @@
+import datetime
+
+from benchmarks.synthetic_pages import SyntheticPages, TournamentState
+from clients.client import RTTFClient
+from parsers.players_parser import PlayersParser
+from parsers.tournament_parser import TournamentParser
+from parsers.tournaments_parser import TournamentsParser
+from utils.models import DateRange
+
+
+def test_tournament_pages_are_parsed():
+    pages = SyntheticPages(seed=1)
+    completed = TournamentParser.parse_data(
+        pages.tournament_page(7, TournamentState.COMPLETED, registered=300)
+    )
+    assert completed.id == 7
+    assert completed.is_completed
+    assert len(completed.player_results) == 300
+
+    online = TournamentParser.parse_data(
+        pages.tournament_page(8, TournamentState.ONLINE, registered=50, refused=5)
+    )
+    assert online.is_online and not online.is_completed
+    assert len(online.refused_players) == 5
+
+    upcoming = TournamentParser.parse_data(
+        pages.tournament_page(9, TournamentState.UPCOMING, registered=40, refused=3)
+    )
+    assert len(upcoming.registered_players) == 40
+    assert len(upcoming.refused_players) == 3
+
+
+def test_pages_are_deterministic():
+    page = SyntheticPages(seed=5).players_page(10)
+    assert SyntheticPages(seed=5).players_page(10) == page
+    assert SyntheticPages(seed=6).players_page(10) != page
+    assert len(PlayersParser.parse_data(SyntheticPages().players_page(500))) == 500
+
+
+def test_listing_pagination_at_scale(monkeypatch):
+    pages = SyntheticPages(seed=2)
+
+    def get_tournaments_for_range(date_range):
+        return pages.tournaments_page(date_range.date_from, date_range.date_to)
+
+    monkeypatch.setattr(
+        RTTFClient, 'get_tournaments_for_range', get_tournaments_for_range
+    )
+    date_from = datetime.date(2025, 4, 1)
+    date_to = datetime.date(2025, 4, 10)
+    ids = {
+        tournament.id
+        for page in RTTFClient.iter_tournaments_pages(DateRange(date_from, date_to))
+        for tournament in TournamentsParser.parse_data(page)
+    }
+    # 10 дней по 50 турниров при 100 турнирах на странице
+    assert len(ids) == 500
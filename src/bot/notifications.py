@@ -1,11 +1,14 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from bot.bot_context import BotContext
 from utils.models import Player, PlayerTournamentInfo, Tournament
 
+if TYPE_CHECKING:
+    # bot.bot_context создаёт TeleBot при импорте
+    from bot.bot_context import BotContext
+
 
 def send_player_update(
-    user_id: int, info: PlayerTournamentInfo, bot_context: Optional[BotContext] = None
+    user_id: int, info: PlayerTournamentInfo, bot_context: Optional['BotContext'] = None
 ) -> str:
     player = Player(id=info.player_id, name=info.player_name)
     tournament = Tournament(id=info.tournament_id, name=info.tournament_name)
@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
+
+from clients.client import RTTFClient
+from clients.page_cache import PageKind, get_page_ttl
+from utils.custom_logger import logger
+from utils.models import DateRange
+from utils.settings import settings
+
+T = TypeVar('T')
+
+
+class AsyncRTTFClient:
+    """Асинхронная версия RTTFClient.
+
+    Все запросы идут через один httpx.AsyncClient с keep-alive соединениями.
+    Число запросов в полёте ограничено семафором (settings.MAX_CONCURRENT_REQUESTS).
+    URL и заголовки берутся из RTTFClient, чтобы клиенты не расходились.
+
+    Использование:
+        async with AsyncRTTFClient() as client:
+            pages = await client.get_tournaments([168138, 168577])
+    """
+
+    # Event loop и клиент потока для вызовов из синхронного кода, см. run
+    _local = threading.local()
+
+    def __init__(self, max_concurrency: int | None = None):
+        if max_concurrency is None:
+            max_concurrency = settings.MAX_CONCURRENT_REQUESTS
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> 'AsyncRTTFClient':
+        self._client = httpx.AsyncClient(
+            headers=RTTFClient.headers,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            timeout=httpx.Timeout(30.0),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._client.aclose()
+        self._client = None
+
+    @classmethod
+    def run(cls, func: Callable[['AsyncRTTFClient'], Awaitable[T]]) -> T:
+        """Выполняет корутину с клиентом из синхронного кода.
+
+        Поток держит свои event loop и клиент между вызовами, поэтому
+        keep-alive соединения переиспользуются. В потоке с запущенным event
+        loop (например, в корутине) нужно await func(client) с клиентом из
+        async with.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                'AsyncRTTFClient.run cannot be called from a running event loop'
+            )
+        local = cls._local
+        if getattr(local, 'loop', None) is None:
+            loop = asyncio.new_event_loop()
+            client = cls()
+            loop.run_until_complete(client.__aenter__())
+            local.loop, local.client = loop, client
+        return local.loop.run_until_complete(func(local.client))
+
+    @classmethod
+    def close_thread_client(cls) -> None:
+        """Закрывает клиент и event loop текущего потока, если они есть"""
+        local = cls._local
+        loop = getattr(local, 'loop', None)
+        if loop is None:
+            return
+        try:
+            loop.run_until_complete(local.client.__aexit__(None, None, None))
+        finally:
+            loop.close()
+            local.loop = local.client = None
+
+    @retry(
+        stop=stop_after_attempt(3),  # Остановиться после 3 попыток
+        wait=wait_fixed(2),  # Ждать 2 секунды между попытками
+        retry=retry_if_exception_type(httpx.TransportError),  # Только сетевые ошибки
+        reraise=True,
+    )
+    async def _get(self, url: str) -> httpx.Response:
+        rate_limiter = RTTFClient.rate_limiter
+        async with self._semaphore:
+            await rate_limiter.acquire_async()
+            start_time = time.monotonic()
+            try:
+                response = await self._client.get(url)
+            except httpx.TransportError:
+                await rate_limiter.report_async(None, time.monotonic() - start_time)
+                raise
+            await rate_limiter.report_async(
+                response.status_code, time.monotonic() - start_time
+            )
+            return response
+
+    async def make_request(self, url: str, raise_404: bool = True) -> httpx.Response:
+        if self._client is None:
+            raise RuntimeError('AsyncRTTFClient must be used as async context manager')
+        try:
+            response = await self._get(url)
+            if not raise_404 and response.status_code == 404:
+                logger.debug('Page not found %s', url)
+                return response
+            response.raise_for_status()
+            logger.debug('Successful request to %s', url)
+            return response
+        except httpx.HTTPError as e:
+            logger.warning('Failed request to %s', url)
+            raise RuntimeError(f'Error during request: {e}')
+
+    async def get_page(
+        self, url: str, kind: PageKind, raise_404: bool = True
+    ) -> str:
+        """Асинхронный аналог RTTFClient.get_page с тем же кэшем.
+
+        Кэш может ходить в базу, поэтому обращения к нему вынесены в поток.
+        """
+        page = await asyncio.to_thread(RTTFClient.page_cache.get, url)
+        if page is not None:
+            logger.debug('Page cache hit %s', url)
+            return page
+        return await RTTFClient.single_flight.do_async(
+            url, lambda: self._download_page(url, kind, raise_404)
+        )
+
+    async def _download_page(self, url: str, kind: PageKind, raise_404: bool) -> str:
+        response = await self.make_request(url, raise_404=raise_404)
+        page = '' if response.status_code == 404 else response.text
+        await asyncio.to_thread(
+            RTTFClient.page_cache.set, url, page, get_page_ttl(kind, page)
+        )
+        return page
+
+    async def get_tournaments_for_date(self, single_date: datetime.date) -> str:
+        return await self.get_tournaments_for_range(
+            DateRange(single_date, single_date)
+        )
+
+    async def get_tournaments_for_range(self, date_range: DateRange) -> str:
+        url = RTTFClient.create_url_for_get_tournaments_pages(date_range=date_range)
+        return await self.get_page(url, PageKind.TOURNAMENTS)
+
+    async def get_tournaments_pages(
+        self,
+        date_range: DateRange | None = None,
+    ) -> list[str]:
+        """Асинхронный аналог RTTFClient.get_tournaments_pages. Страницы
+        запрашиваются по очереди: диапазон следующей зависит от предыдущей"""
+        if date_range is None:
+            date_range = DateRange()
+        pages = []
+        date_to = date_range.date_to
+        while date_to is not None:
+            page = await self.get_tournaments_for_range(
+                DateRange(date_range.date_from, date_to)
+            )
+            pages.append(page)
+            date_to = RTTFClient.get_next_date_to(page, date_to)
+        return pages
+
+    async def get_tournament(self, tournament_id: int) -> str:
+        url = RTTFClient.create_url_for_tournament(tournament_id)
+        page = await self.get_page(url, PageKind.TOURNAMENT, raise_404=False)
+        if page:
+            logger.info('Downloaded tournament {}'.format(tournament_id))
+        return page
+
+    async def get_tournaments(self, tournament_ids: list[int]) -> list[str]:
+        return list(await asyncio.gather(*map(self.get_tournament, tournament_ids)))
+
+    async def get_player(self, player_id: int) -> str:
+        url = RTTFClient.create_url_for_player(player_id)
+        page = await self.get_page(url, PageKind.PLAYER)
+        logger.info('Downloaded player {}'.format(player_id))
+        return page
+
+    async def get_players(self, search_str: str) -> str:
+        url = RTTFClient.create_url_for_players(search_str)
+        page = await self.get_page(url, PageKind.PLAYERS)
+        logger.info('Downloaded players search with str {}'.format(search_str))
+        return page
@@ -1,18 +1,32 @@
 import os.path
 import datetime
-from multiprocessing.pool import ThreadPool
-from typing import Any
+import re
+import threading
+import time
+from typing import Any, Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 
+from clients.page_cache import PageCache, PageKind, get_page_ttl
+from clients.rate_limiter import RateLimiter
 from utils.models import DateRange
+from utils.single_flight import SingleFlight
 from utils.settings import settings
 from utils.custom_logger import logger
 
 
+# Строки списка турниров: турнир и заголовок дня
+TOURNAMENT_ROW_RE = re.compile(r'<tr[^>]*onclick="location=\'/tournaments/\d+\'')
+DATE_ROW_RE = re.compile(r'<tr class="date"><th colspan="3">(\d{2}\.\d{2}\.\d{4})')
+
+
 class RTTFClient:
     BASE_URL = 'https://m.rttf.ru/'
+    # Сколько турниров сайт максимум показывает на одной странице списка.
+    # Дни идут от поздних к ранним, всё, что не влезло, отбрасывается
+    TOURNAMENTS_PAGE_LIMIT = 100
     cities = ['r77']
     headers = {
         'User-Agent': (
@@ -21,6 +35,72 @@ class RTTFClient:
             'Chrome/58.0.3029.110 Safari/537.3'
         )
     }
+    # Одна сессия на процесс: keep-alive соединения к m.rttf.ru переиспользуются
+    # между запросами и потоками, вместо нового TCP/TLS рукопожатия на каждый запрос
+    _session: requests.Session | None = None
+    _session_lock = threading.Lock()
+    # Read-through кэш страниц, общий для RTTFClient и AsyncRTTFClient
+    page_cache: PageCache = PageCache()
+    # Бюджет запросов к m.rttf.ru, общий для бота и кронов
+    rate_limiter: RateLimiter = RateLimiter()
+    # Одновременные запросы одного URL (в том числе из AsyncRTTFClient)
+    # ждут одно скачивание
+    single_flight: SingleFlight = SingleFlight()
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Возвращает общую потокобезопасную сессию с пулом соединений.
+
+        Размер пула равен settings.MAX_WORKERS, чтобы параллельные потоки
+        (например, обработчики бота) держали свои соединения. При исчерпании
+        пула поток ждёт свободное соединение, а не открывает новое.
+        """
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.MAX_WORKERS,
+                        pool_block=True,
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def close_session(cls) -> None:
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
+    @classmethod
+    def get_connection_stats(cls) -> dict[str, int]:
+        """Счётчики пула: сколько запросов сделано и сколько соединений открыто.
+
+        reused - число запросов, которые ушли по уже открытому соединению.
+        """
+        requests_count = 0
+        connections_count = 0
+        session = cls._session
+        if session is not None:
+            adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    try:
+                        pool = pools[key]
+                    except KeyError:
+                        continue
+                    requests_count += pool.num_requests
+                    connections_count += pool.num_connections
+        return {
+            'requests': requests_count,
+            'connections': connections_count,
+            'reused': requests_count - connections_count,
+        }
 
     @classmethod
     @retry(
@@ -38,8 +118,11 @@ class RTTFClient:
     ) -> requests.Response:
         if headers is None:
             headers = cls.headers
+        cls.rate_limiter.acquire()
+        start_time = time.monotonic()
         try:
-            response = requests.get(url=url, headers=headers)
+            response = cls.get_session().get(url=url, headers=headers)
+            cls.rate_limiter.report(response.status_code, time.monotonic() - start_time)
             if not raise_404 and response.status_code == 404:
                 logger.debug('Page not found %s', url)
                 return response
@@ -47,9 +130,32 @@ class RTTFClient:
             logger.debug('Successful request to %s', url)
             return response
         except requests.RequestException as e:
+            if e.response is None:
+                cls.rate_limiter.report(None, time.monotonic() - start_time)
             logger.warning('Failed request to %s', url)
             raise RuntimeError(f'Error during request: {e}')
 
+    @classmethod
+    def get_page(cls, url: str, kind: PageKind, raise_404: bool = True) -> str:
+        """Возвращает страницу из кэша, а при промахе скачивает и кладёт в кэш.
+
+        Для несуществующей страницы (404 при raise_404=False) возвращает ''.
+        """
+        page = cls.page_cache.get(url)
+        if page is not None:
+            logger.debug('Page cache hit %s', url)
+            return page
+        return cls.single_flight.do(
+            url, lambda: cls._download_page(url, kind, raise_404)
+        )
+
+    @classmethod
+    def _download_page(cls, url: str, kind: PageKind, raise_404: bool) -> str:
+        response = cls.make_request(url, raise_404=raise_404)
+        page = '' if response.status_code == 404 else response.text
+        cls.page_cache.set(url, page, get_page_ttl(kind, page))
+        return page
+
     @classmethod
     def make_request_all_data(
         cls, url: str, headers: dict[str, Any] | None = None
@@ -61,7 +167,7 @@ class RTTFClient:
 
         while url:  # Continue until no further page
             try:
-                response = requests.get(url=url, headers=headers)
+                response = cls.get_session().get(url=url, headers=headers)
                 response.raise_for_status()
                 data = response.json()  # Assumes JSON response
 
@@ -80,12 +186,12 @@ class RTTFClient:
         only_moscow: bool = True,
     ) -> str:
         if date_range is None and only_moscow:
-            return 'https://m.rttf.ru/tournaments/?cities[]=r77'
+            return f'{cls.BASE_URL}tournaments/?cities[]=r77'
         if date_range is None and not only_moscow:
             raise NotImplementedError('Bad params')
         msc_substr = '&cities%5B%5D=r77' if only_moscow else ''
         return (
-            f'https://m.rttf.ru/tournaments/'
+            f'{cls.BASE_URL}tournaments/'
             f'?date_from={date_range.date_from}'
             f'&date_to={date_range.date_to}'
             f'&title='
@@ -93,62 +199,123 @@ class RTTFClient:
             f'&search='
         )
 
+    @classmethod
+    def create_url_for_tournament(cls, tournament_id: int) -> str:
+        return os.path.join(cls.BASE_URL, 'tournaments', str(tournament_id))
+
+    @classmethod
+    def create_url_for_player(cls, player_id: int) -> str:
+        return os.path.join(cls.BASE_URL, 'players', str(player_id))
+
+    @classmethod
+    def create_url_for_players(cls, search_str: str) -> str:
+        return os.path.join(cls.BASE_URL, 'players') + '/?name=' + search_str
+
     @classmethod
     def get_tournaments_for_date(cls, single_date: datetime.date | None = None) -> str:
-        """Скачивает html с турнирами.
+        """Скачивает html с турнирами за один день."""
+        return cls.get_tournaments_for_range(DateRange(single_date, single_date))
 
-        Если single_date указана, скачивает для данной даты, иначе скачивает для
-        стартовой страницы.
-        Не реализован метод скачивания для диапазона дат, так как не понятно, как
-        обойти пагинацию.
+    @classmethod
+    def get_tournaments_for_range(cls, date_range: DateRange) -> str:
+        """Скачивает одну страницу списка турниров за диапазон дат.
+
+        Страница может быть обрезана, см. iter_tournaments_pages.
         """
-        url = cls.create_url_for_get_tournaments_pages(
-            date_range=DateRange(single_date, single_date)
-        )
-        response = cls.make_request(url)
-        return response.text
+        url = cls.create_url_for_get_tournaments_pages(date_range=date_range)
+        return cls.get_page(url, PageKind.TOURNAMENTS)
 
     @classmethod
-    def get_tournaments_pages(
+    def iter_tournaments_pages(
         cls,
         date_range: DateRange | None = None,
-    ) -> list[str]:
+    ) -> Iterator[str]:
+        """Скачивает список турниров за диапазон дат, отдавая страницы по мере
+        скачивания.
+
+        Сайт показывает не больше TOURNAMENTS_PAGE_LIMIT турниров, начиная с
+        поздних дней, и самый ранний день на обрезанной странице может быть
+        неполным. Поэтому следующая страница запрашивается за диапазон от
+        date_from до этого дня включительно. Турниры неполного дня повторятся
+        на следующей странице, вызывающий код должен убирать дубли по id.
+        Страница за один день содержит "итого", которое проверяет
+        TournamentsParser.
+        """
         if date_range is None:
             date_range = DateRange()
+        date_to = date_range.date_to
+        while date_to is not None:
+            page = cls.get_tournaments_for_range(
+                DateRange(date_range.date_from, date_to)
+            )
+            yield page
+            date_to = cls.get_next_date_to(page, date_to)
+
+    @classmethod
+    def get_next_date_to(
+        cls, page: str, date_to: datetime.date
+    ) -> datetime.date | None:
+        """Конец диапазона следующей страницы списка турниров или None, если
+        страница page за диапазон до date_to не обрезана. Общий для
+        RTTFClient и AsyncRTTFClient"""
+        rows_count = len(TOURNAMENT_ROW_RE.findall(page))
         dates = [
-            date_range.date_from + datetime.timedelta(days=i)
-            for i in range((date_range.date_to - date_range.date_from).days + 1)
+            datetime.datetime.strptime(date_str, '%d.%m.%Y').date()
+            for date_str in DATE_ROW_RE.findall(page)
         ]
-        with ThreadPool(settings.MAX_WORKERS) as pool:
-            pages = pool.map(cls.get_tournaments_for_date, dates)
-        date_page_mapping = list(zip(dates, pages))
-        return [page for date, page in date_page_mapping]
+        if rows_count < cls.TOURNAMENTS_PAGE_LIMIT or not dates:
+            return None
+        earliest_date = min(dates)
+        if earliest_date >= date_to:
+            logger.warning(
+                'Tournaments page for %s is full, some tournaments may be lost',
+                date_to,
+            )
+            return None
+        logger.debug('Tournaments page is truncated at %s', earliest_date)
+        return earliest_date
+
+    @classmethod
+    def get_tournaments_pages(
+        cls,
+        date_range: DateRange | None = None,
+    ) -> list[str]:
+        """Скачивает все страницы списка турниров за диапазон дат."""
+        return list(cls.iter_tournaments_pages(date_range))
+
+    @classmethod
+    def get_tournaments(cls, tournament_ids: list[int]) -> list[str]:
+        """Конкурентно скачивает страницы турниров. Порядок совпадает с ids."""
+        from clients.async_client import AsyncRTTFClient
+
+        return AsyncRTTFClient.run(
+            lambda client: client.get_tournaments(tournament_ids)
+        )
 
     @classmethod
     def get_tournament(
         cls,
         tournament_id: int,
     ) -> str:
-        url = os.path.join(cls.BASE_URL, 'tournaments', str(tournament_id))
-        response = cls.make_request(url, raise_404=False)
-        if response.status_code != 404:
+        url = cls.create_url_for_tournament(tournament_id)
+        page = cls.get_page(url, PageKind.TOURNAMENT, raise_404=False)
+        if page:
             logger.info('Downloaded tournament {}'.format(tournament_id))
-            return response.text
-        return ''
+        return page
 
     @classmethod
     def get_player(cls, player_id: int) -> str:
-        url = os.path.join(cls.BASE_URL, 'players', str(player_id))
-        response = cls.make_request(url)
+        url = cls.create_url_for_player(player_id)
+        page = cls.get_page(url, PageKind.PLAYER)
         logger.info('Downloaded player {}'.format(player_id))
-        return response.text
+        return page
 
     @classmethod
     def get_players(cls, search_str: str) -> str:
-        url = os.path.join(cls.BASE_URL, 'players') + '/?name=' + search_str
-        response = cls.make_request(url)
+        url = cls.create_url_for_players(search_str)
+        page = cls.get_page(url, PageKind.PLAYERS)
         logger.info('Downloaded players search with str {}'.format(search_str))
-        return response.text
+        return page
 
 
 def main():
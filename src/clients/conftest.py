@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+from clients.client import RTTFClient
+from clients.page_cache import PageCache
+from clients.rate_limiter import RateLimiter
+
+# Подменяем m.rttf.ru локальным сервером, который отдаёт сохранённые страницы
+FIXTURES = {
+    '/tournaments/': 'htmls/2025-04-12/tournaments/full_list.html',
+    '/tournaments/168138': 'htmls/2025-04-12/tournament/168138.html',
+    '/tournaments/168577': 'htmls/2025-04-12/tournament/168577.html',
+    '/tournaments/169946': 'htmls/2025-04-25/tournament/169946.html',
+    '/players/168970': 'htmls/2024-10-26/player/annovid.html',
+    '/players/': 'htmls/2024-10-26/players/3.html',
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        with self.server.lock:
+            self.server.requested_paths.append(self.path)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(
+                self.server.max_in_flight, self.server.in_flight
+            )
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        fixture = FIXTURES.get(path)
+        if fixture is None or not os.path.isfile(fixture):
+            body = b'Not found'
+            self.send_response(404)
+        else:
+            with open(fixture, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_page_cache(monkeypatch):
+    """По умолчанию тесты клиентов ходят в сеть мимо кэша страниц"""
+    monkeypatch.setattr(RTTFClient, 'page_cache', PageCache(max_size=0, use_db=False))
+
+
+@pytest.fixture(autouse=True)
+def local_rate_limiter(tmp_path, monkeypatch):
+    """Отдельный лимитер на тест, чтобы не трогать общий файл состояния"""
+    rate_limiter = RateLimiter(
+        path=str(tmp_path / 'rate_limit.json'),
+        max_rate=1000,
+        initial_rate=1000,
+        burst=1000,
+    )
+    monkeypatch.setattr(RTTFClient, 'rate_limiter', rate_limiter)
+    return rate_limiter
+
+
+@pytest.fixture
+def rttf_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requested_paths = []
+    server.in_flight = 0
+    server.max_in_flight = 0
+    # Задержка ответа, чтобы запросы успевали пересечься во времени
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}/'
+    yield server
+    server.shutdown()
+    server.server_close()
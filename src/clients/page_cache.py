@@ -0,0 +1,141 @@
+import enum
+import threading
+import time
+from collections import OrderedDict
+
+from db.models import DBPage
+from db.session_factory import open_session
+from utils.custom_logger import logger
+from utils.settings import settings
+
+
+class PageKind(enum.Enum):
+    TOURNAMENT = 'tournament'
+    TOURNAMENTS = 'tournaments'
+    PLAYER = 'player'
+    PLAYERS = 'players'
+
+
+def get_page_ttl(kind: PageKind, page: str) -> int:
+    """Время жизни страницы в кэше в зависимости от типа и содержимого.
+
+    Страница турнира с таблицей результатов больше не меняется, поэтому живёт
+    долго. Идущие и будущие турниры и списки турниров обновляются часто.
+    """
+    if kind == PageKind.TOURNAMENT:
+        if 'tablesort tour-players' in page:
+            return settings.PAGE_CACHE_TTL_FINISHED
+        return settings.PAGE_CACHE_TTL_LIVE
+    if kind == PageKind.TOURNAMENTS:
+        return settings.PAGE_CACHE_TTL_LIVE
+    return settings.PAGE_CACHE_TTL_PROFILE
+
+
+class PageCache:
+    """Read-through кэш страниц RTTF из двух уровней.
+
+    - LRU в памяти процесса на max_size страниц
+    - Таблица rttf_pages, через которую бот и кроны видят скачивания друг друга
+
+    Ошибки базы не ломают запросы: кэш просто пропускается.
+    """
+
+    def __init__(self, max_size: int | None = None, use_db: bool | None = None):
+        self.max_size = settings.PAGE_CACHE_SIZE if max_size is None else max_size
+        self.use_db = settings.PAGE_CACHE_DB if use_db is None else use_db
+        self._pages: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> str | None:
+        now = int(time.time())
+        with self._lock:
+            entry = self._pages.get(url)
+            if entry is not None:
+                page, expires_at = entry
+                if expires_at > now:
+                    self._pages.move_to_end(url)
+                    self.memory_hits += 1
+                    return page
+                del self._pages[url]
+
+        if self.use_db:
+            entry = self._get_from_db(url, now)
+            if entry is not None:
+                page, expires_at = entry
+                self._put_to_memory(url, page, expires_at)
+                with self._lock:
+                    self.db_hits += 1
+                return page
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, url: str, page: str, ttl: int) -> None:
+        expires_at = int(time.time()) + ttl
+        self._put_to_memory(url, page, expires_at)
+        if self.use_db:
+            self._save_to_db(url, page, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._pages),
+            }
+
+    @classmethod
+    def delete_expired(cls, now: int | None = None) -> int:
+        """Удаляет устаревшие страницы из таблицы rttf_pages."""
+        if now is None:
+            now = int(time.time())
+        with open_session() as session:
+            deleted = (
+                session.query(DBPage).filter(DBPage.expires_at <= now).delete()
+            )
+            session.commit()
+        return deleted
+
+    def _put_to_memory(self, url: str, page: str, expires_at: int) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._pages[url] = (page, expires_at)
+            self._pages.move_to_end(url)
+            while len(self._pages) > self.max_size:
+                self._pages.popitem(last=False)
+                self.evictions += 1
+
+    def _get_from_db(self, url: str, now: int) -> tuple[str, int] | None:
+        try:
+            with open_session() as session:
+                db_page = (
+                    session.query(DBPage)
+                    .filter(DBPage.url == url, DBPage.expires_at > now)
+                    .first()
+                )
+                if db_page is None:
+                    return None
+                return db_page.page, db_page.expires_at
+        except Exception as e:
+            logger.warning('Page cache read failed for %s: %s', url, e)
+            return None
+
+    def _save_to_db(self, url: str, page: str, expires_at: int) -> None:
+        try:
+            with open_session() as session:
+                session.merge(DBPage(url=url, page=page, expires_at=expires_at))
+                session.commit()
+        except Exception as e:
+            logger.warning('Page cache write failed for %s: %s', url, e)
@@ -0,0 +1,160 @@
+import asyncio
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from utils.custom_logger import logger
+from utils.settings import settings
+
+
+class RateLimiter:
+    """Token bucket для запросов к RTTF, общий для всех процессов.
+
+    Состояние (текущая скорость, число токенов) лежит в json файле и меняется
+    под fcntl.flock на соседнем файле .lock, поэтому бот и кроны расходуют
+    один бюджет. Для разных контейнеров файлы должны лежать на общем volume.
+
+    Скорость подбирается по AIMD: каждый успешный быстрый ответ увеличивает её
+    на increase_step, а 429, 5xx, сетевая ошибка или медленный ответ
+    умножают на decrease_factor (не чаще раза в секунду).
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+        initial_rate: float | None = None,
+        burst: float | None = None,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+        latency_threshold: float | None = None,
+    ):
+        self.path = path or settings.RATE_LIMIT_PATH
+        self.lock_path = f'{self.path}.lock'
+        self.min_rate = min_rate if min_rate is not None else settings.RATE_LIMIT_MIN
+        self.max_rate = max_rate if max_rate is not None else settings.RATE_LIMIT_MAX
+        self.initial_rate = (
+            initial_rate if initial_rate is not None else settings.RATE_LIMIT_INITIAL
+        )
+        self.burst = burst if burst is not None else settings.RATE_LIMIT_BURST
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = (
+            latency_threshold
+            if latency_threshold is not None
+            else settings.RATE_LIMIT_LATENCY_THRESHOLD
+        )
+
+    @contextmanager
+    def _locked_state(self, now: float):
+        """Открывает файл состояния под эксклюзивной блокировкой.
+
+        Блокируется отдельный файл: состояние записывается во временный файл
+        и подменяется через os.replace, так что оборванная запись не портит
+        его. Нечитаемое состояние сбрасывается к начальному.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = self._read_state()
+                state.setdefault('rate', self.initial_rate)
+                state.setdefault('tokens', self.burst)
+                state.setdefault('updated_at', now)
+                state.setdefault('decreased_at', 0.0)
+                yield state
+                self._write_state(state)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_state(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning('Rate limiter: state file %s is corrupted, reset', self.path)
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def _write_state(self, state: dict) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def reserve(self, now: float | None = None) -> float:
+        """Резервирует токен и возвращает, сколько секунд нужно подождать."""
+        if now is None:
+            now = time.time()
+        with self._locked_state(now) as state:
+            elapsed = max(0.0, now - state['updated_at'])
+            tokens = min(self.burst, state['tokens'] + elapsed * state['rate'])
+            tokens -= 1
+            state['tokens'] = tokens
+            state['updated_at'] = now
+            if tokens >= 0:
+                return 0.0
+            return -tokens / state['rate']
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            logger.debug('Rate limiter: waiting %.2fs', wait)
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        # Файл состояния читается под flock: пока его держит другой процесс,
+        # event loop не должен стоять
+        wait = await asyncio.to_thread(self.reserve)
+        if wait > 0:
+            logger.debug('Rate limiter: waiting %.2fs', wait)
+            await asyncio.sleep(wait)
+
+    async def report_async(self, status_code: int | None, latency: float) -> float:
+        """report в отдельном потоке, чтобы не блокировать event loop"""
+        return await asyncio.to_thread(self.report, status_code, latency)
+
+    def report(
+        self, status_code: int | None, latency: float, now: float | None = None
+    ) -> float:
+        """Подстраивает скорость по результату запроса и возвращает новую.
+
+        status_code=None означает сетевую ошибку.
+        """
+        if now is None:
+            now = time.time()
+        throttled = status_code is None or status_code == 429 or status_code >= 500
+        slow = latency > self.latency_threshold
+        with self._locked_state(now) as state:
+            if throttled or slow:
+                # Пачка неудачных ответов на одну и ту же перегрузку
+                # уменьшает скорость один раз
+                if now - state['decreased_at'] >= 1.0:
+                    state['rate'] = max(
+                        self.min_rate, state['rate'] * self.decrease_factor
+                    )
+                    state['decreased_at'] = now
+                    logger.warning(
+                        'Rate limiter: rate decreased to %.2f rps '
+                        '(status=%s, latency=%.2fs)',
+                        state['rate'],
+                        status_code,
+                        latency,
+                    )
+            else:
+                state['rate'] = min(self.max_rate, state['rate'] + self.increase_step)
+            return state['rate']
+
+    def get_rate(self) -> float:
+        """Текущая разрешённая скорость, запросов в секунду."""
+        if not os.path.exists(self.path):
+            return self.initial_rate
+        with self._locked_state(time.time()) as state:
+            return state['rate']
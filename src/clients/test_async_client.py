@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+
+import pytest
+
+from clients.async_client import AsyncRTTFClient
+from clients.client import RTTFClient
+from parsers.player_parser import PlayerParser
+from parsers.players_parser import PlayersParser
+from parsers.tournament_parser import TournamentParser
+from parsers.tournaments_parser import TournamentsParser
+from utils.models import DateRange
+
+
+@pytest.fixture
+def local_server(rttf_server, monkeypatch):
+    monkeypatch.setattr(RTTFClient, 'BASE_URL', rttf_server.base_url)
+    return rttf_server
+
+
+def run(coro_func, max_concurrency=None):
+    async def runner():
+        async with AsyncRTTFClient(max_concurrency=max_concurrency) as client:
+            return await coro_func(client)
+
+    return asyncio.run(runner())
+
+
+def test_get_tournament(local_server):
+    page = run(lambda client: client.get_tournament(168577))
+    tournament = TournamentParser.parse_data(page)
+    assert tournament.id == 168577
+    assert {player.id for player in tournament.registered_players} == {107011}
+
+
+def test_get_tournament_not_found(local_server):
+    assert run(lambda client: client.get_tournament(1)) == ''
+
+
+def test_get_tournaments_keeps_order(local_server):
+    ids = [168577, 1, 168138, 169946]
+    pages = run(lambda client: client.get_tournaments(ids))
+    assert pages[1] == ''
+    parsed_ids = [TournamentParser.parse_data(page).id for page in pages if page]
+    assert parsed_ids == [168577, 168138, 169946]
+
+
+def test_get_player_and_players(local_server):
+    player = PlayerParser.parse_data(run(lambda client: client.get_player(168970)))
+    assert player.id == 168970
+    players = PlayersParser.parse_data(
+        run(lambda client: client.get_players('Синяев'))
+    )
+    assert len(players) > 0
+
+
+def test_get_tournaments_pages(local_server):
+    date_range = DateRange(datetime.date(2025, 4, 10), datetime.date(2025, 4, 12))
+    pages = run(lambda client: client.get_tournaments_pages(date_range))
+    # Страница не обрезана: весь диапазон одним запросом
+    assert len(pages) == 1
+    assert len(TournamentsParser.parse_data(pages[0])) == 51
+    [path] = local_server.requested_paths
+    assert 'date_from=2025-04-10&date_to=2025-04-12' in path
+
+
+def test_tournaments_range_follows_truncation(monkeypatch):
+    def read(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    folder = 'htmls/2024-10-26/tournaments'
+    pages = {
+        datetime.date(2024, 10, 27): read(f'{folder}/tournaments1.html'),
+        datetime.date(2024, 10, 22): read(f'{folder}/tournaments.html'),
+        datetime.date(2024, 10, 20): read(f'{folder}/t.html'),
+    }
+    requested = []
+
+    async def get_tournaments_for_range(self, date_range):
+        requested.append(date_range.date_to)
+        return pages[date_range.date_to]
+
+    monkeypatch.setattr(
+        AsyncRTTFClient, 'get_tournaments_for_range', get_tournaments_for_range
+    )
+    date_range = DateRange(datetime.date(2024, 10, 1), datetime.date(2024, 10, 27))
+    result = run(lambda client: client.get_tournaments_pages(date_range))
+    # Так же, как RTTFClient.get_tournaments_pages
+    assert len(result) == 3
+    assert requested == list(pages)
+
+
+def test_concurrency_is_bounded(local_server):
+    local_server.delay = 0.05
+    # Разные URL, чтобы запросы не схлопывались
+    pages = run(
+        lambda client: client.get_tournaments(list(range(1, 13))), max_concurrency=3
+    )
+    assert pages == [''] * 12
+    assert 1 < local_server.max_in_flight <= 3
+
+
+def test_sync_facade_uses_async_fan_out(local_server):
+    try:
+        pages = RTTFClient.get_tournaments([168577, 168138])
+        client = AsyncRTTFClient._local.client
+        RTTFClient.get_tournaments([169946])
+        # Клиент и его соединения живут между вызовами в потоке
+        assert AsyncRTTFClient._local.client is client
+    finally:
+        AsyncRTTFClient.close_thread_client()
+    assert [TournamentParser.parse_data(page).id for page in pages] == [
+        168577,
+        168138,
+    ]
+
+
+def test_sync_facade_rejects_running_loop():
+    async def call():
+        RTTFClient.get_tournaments([168577])
+
+    with pytest.raises(RuntimeError, match='running event loop'):
+        asyncio.run(call())
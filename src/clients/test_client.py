@@ -0,0 +1,90 @@
+import datetime
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from clients.client import RTTFClient
+from parsers.tournaments_parser import TournamentsParser
+from utils.models import DateRange
+from utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def local_client(rttf_server, monkeypatch):
+    monkeypatch.setattr(RTTFClient, 'BASE_URL', rttf_server.base_url)
+    RTTFClient.close_session()
+    yield RTTFClient
+    RTTFClient.close_session()
+
+
+def test_session_reuses_connections(local_client):
+    for _ in range(3):
+        page = local_client.get_tournament(168577)
+        assert 'tour-reg-list' in page
+
+    stats = local_client.get_connection_stats()
+    assert stats['requests'] == 3
+    assert stats['connections'] == 1
+    assert stats['reused'] == 2
+
+
+def test_session_is_shared_between_threads(local_client):
+    # Разные URL, чтобы запросы не схлопывались
+    with ThreadPool(4) as pool:
+        pages = pool.map(local_client.get_tournament, range(1, 21))
+    assert pages == [''] * 20
+
+    stats = local_client.get_connection_stats()
+    assert stats['requests'] == 20
+    # Соединений открывается не больше, чем потоков
+    assert stats['connections'] <= 4
+
+
+def test_not_found_tournament(local_client):
+    assert local_client.get_tournament(1) == ''
+
+
+def test_concurrent_requests_are_coalesced(local_client, rttf_server, monkeypatch):
+    monkeypatch.setattr(RTTFClient, 'single_flight', SingleFlight())
+    rttf_server.delay = 0.2
+    with ThreadPool(8) as pool:
+        pages = pool.map(local_client.get_tournament, [168577] * 8)
+    assert len(set(pages)) == 1
+    assert len(rttf_server.requested_paths) == 1
+
+
+def test_tournaments_range_follows_truncation(monkeypatch):
+    def read(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    # Страница обрезана на 100 турнирах: первая заканчивается неполным 22.10,
+    # вторая неполным 20.10, третья короткая и закрывает диапазон
+    folder = 'htmls/2024-10-26/tournaments'
+    pages = {
+        datetime.date(2024, 10, 27): read(f'{folder}/tournaments1.html'),
+        datetime.date(2024, 10, 22): read(f'{folder}/tournaments.html'),
+        datetime.date(2024, 10, 20): read(f'{folder}/t.html'),
+    }
+    requested = []
+
+    def get_tournaments_for_range(date_range):
+        requested.append((date_range.date_from, date_range.date_to))
+        return pages[date_range.date_to]
+
+    monkeypatch.setattr(
+        RTTFClient, 'get_tournaments_for_range', get_tournaments_for_range
+    )
+    date_from = datetime.date(2024, 10, 1)
+    result = RTTFClient.get_tournaments_pages(
+        DateRange(date_from, datetime.date(2024, 10, 27))
+    )
+
+    assert len(result) == 3
+    assert requested == [
+        (date_from, datetime.date(2024, 10, 27)),
+        (date_from, datetime.date(2024, 10, 22)),
+        (date_from, datetime.date(2024, 10, 20)),
+    ]
+    ids = [t.id for page in result for t in TournamentsParser.parse_data(page)]
+    assert len(ids) == 205
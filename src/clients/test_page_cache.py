@@ -0,0 +1,84 @@
+import sqlalchemy as sa
+
+from clients.client import RTTFClient
+from clients.page_cache import PageCache, PageKind, get_page_ttl
+from db.models import Base
+from db.session_factory import SessionLocal
+from utils.settings import settings
+
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def test_lru_eviction_and_stats():
+    cache = PageCache(max_size=2, use_db=False)
+    cache.set('a', 'page a', ttl=60)
+    cache.set('b', 'page b', ttl=60)
+    assert cache.get('a') == 'page a'
+    # 'b' давно не использовалась и вытесняется
+    cache.set('c', 'page c', ttl=60)
+    assert cache.get('b') is None
+    assert cache.get('c') == 'page c'
+
+    stats = cache.get_stats()
+    assert stats['memory_hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['evictions'] == 1
+    assert stats['size'] == 2
+
+
+def test_expired_page_is_a_miss():
+    cache = PageCache(max_size=2, use_db=False)
+    cache.set('a', 'page a', ttl=0)
+    assert cache.get('a') is None
+
+
+def test_ttl_by_page_kind():
+    finished = read('htmls/2025-04-12/tournament/168138.html')
+    live = read('htmls/2025-04-12/tournament/168577.html')
+    assert (
+        get_page_ttl(PageKind.TOURNAMENT, finished)
+        == settings.PAGE_CACHE_TTL_FINISHED
+    )
+    assert get_page_ttl(PageKind.TOURNAMENT, live) == settings.PAGE_CACHE_TTL_LIVE
+    assert get_page_ttl(PageKind.TOURNAMENTS, '') == settings.PAGE_CACHE_TTL_LIVE
+    assert get_page_ttl(PageKind.PLAYER, '') == settings.PAGE_CACHE_TTL_PROFILE
+
+
+def test_db_tier_is_shared_between_caches(monkeypatch):
+    engine = sa.create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    # Фабрика сессий общая для модуля: после теста вернётся прежняя база
+    monkeypatch.setitem(SessionLocal.kw, 'bind', engine)
+
+    # Два кэша имитируют бота и крон в разных процессах
+    bot_cache = PageCache(max_size=10, use_db=True)
+    cron_cache = PageCache(max_size=10, use_db=True)
+    bot_cache.set('url', 'page', ttl=60)
+
+    assert cron_cache.get('url') == 'page'
+    assert cron_cache.get('url') == 'page'
+    stats = cron_cache.get_stats()
+    assert stats['db_hits'] == 1
+    assert stats['memory_hits'] == 1
+
+    bot_cache.set('old', 'page', ttl=-10)
+    assert PageCache.delete_expired() == 1
+    assert cron_cache.get('old') is None
+
+
+def test_client_reads_through_cache(rttf_server, monkeypatch):
+    monkeypatch.setattr(RTTFClient, 'BASE_URL', rttf_server.base_url)
+    monkeypatch.setattr(RTTFClient, 'page_cache', PageCache(max_size=10, use_db=False))
+
+    first = RTTFClient.get_tournament(168577)
+    second = RTTFClient.get_tournament(168577)
+    assert first == second
+    assert len(rttf_server.requested_paths) == 1
+
+    # 404 тоже кэшируется, чтобы не долбить удалённые турниры
+    assert RTTFClient.get_tournament(1) == ''
+    assert RTTFClient.get_tournament(1) == ''
+    assert len(rttf_server.requested_paths) == 2
@@ -0,0 +1,90 @@
+import asyncio
+import fcntl
+import time
+
+import pytest
+
+from clients.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'rate_limit.json')
+
+
+def test_token_bucket_spaces_requests(path):
+    limiter = RateLimiter(path=path, initial_rate=2, max_rate=10, burst=2)
+    now = 1000.0
+    # Пачка размером burst проходит сразу, дальше запросы встают в очередь
+    assert limiter.reserve(now=now) == 0
+    assert limiter.reserve(now=now) == 0
+    assert limiter.reserve(now=now) == pytest.approx(0.5)
+    assert limiter.reserve(now=now) == pytest.approx(1.0)
+    # Через 2 секунды очередь рассосалась и токен снова есть
+    assert limiter.reserve(now=now + 2.5) == 0
+
+
+def test_budget_is_shared_through_file(path):
+    bot_limiter = RateLimiter(path=path, initial_rate=1, max_rate=10, burst=1)
+    cron_limiter = RateLimiter(path=path, initial_rate=1, max_rate=10, burst=1)
+    assert bot_limiter.reserve(now=1000.0) == 0
+    assert cron_limiter.reserve(now=1000.0) == pytest.approx(1.0)
+
+
+def test_aimd(path):
+    limiter = RateLimiter(
+        path=path, initial_rate=4, min_rate=1, max_rate=4.2, latency_threshold=2
+    )
+    assert limiter.report(200, 0.1, now=1000.0) == pytest.approx(4.1)
+    assert limiter.report(200, 0.1, now=1000.0) == pytest.approx(4.2)
+    # Не выше max_rate
+    assert limiter.report(200, 0.1, now=1000.0) == pytest.approx(4.2)
+    # 429 уменьшает скорость вдвое, повтор в ту же секунду - нет
+    assert limiter.report(429, 0.1, now=1001.0) == pytest.approx(2.1)
+    assert limiter.report(503, 0.1, now=1001.5) == pytest.approx(2.1)
+    # Медленный ответ и сетевая ошибка тоже считаются перегрузкой
+    assert limiter.report(200, 3.0, now=1003.0) == pytest.approx(1.05)
+    assert limiter.report(None, 0.1, now=1005.0) == pytest.approx(1.0)
+    assert limiter.get_rate() == pytest.approx(1.0)
+
+
+def test_corrupted_state_is_reset(path):
+    limiter = RateLimiter(path=path, initial_rate=2, max_rate=10, burst=1)
+    # Например, запись оборвалась при падении процесса
+    with open(path, 'w') as f:
+        f.write('{"rate": 5, "tok')
+    assert limiter.reserve(now=1000.0) == 0
+    assert limiter.get_rate() == pytest.approx(2)
+    # Состояние снова читается
+    assert limiter.reserve(now=1000.0) == pytest.approx(0.5)
+
+
+def test_async_calls_do_not_block_loop_on_file_lock(path):
+    limiter = RateLimiter(path=path, initial_rate=10, max_rate=10, burst=10)
+    limiter.reserve()
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        # Файл держит "другой процесс"
+        with open(limiter.lock_path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            acquire = asyncio.create_task(limiter.acquire_async())
+            report = asyncio.create_task(limiter.report_async(200, 0.1))
+            start = time.monotonic()
+            while time.monotonic() - start < 0.2:
+                await asyncio.sleep(0.01)
+            fcntl.flock(f, fcntl.LOCK_UN)
+        await asyncio.gather(acquire, report)
+        task.cancel()
+        return ticks
+
+    # Пока файл заблокирован, event loop продолжает работать
+    assert asyncio.run(main()) >= 10
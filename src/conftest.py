@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def statement_counter():
+    """Считает SQL-запросы к движку внутри with, без BEGIN и COMMIT:
+
+        with statement_counter(engine) as statements:
+            ...
+        assert len(statements) == 2
+    """
+
+    @contextmanager
+    def count(engine: sa.Engine):
+        statements: list[str] = []
+
+        def on_execute(conn, cursor, statement, *args):
+            if not statement.startswith(('BEGIN', 'COMMIT')):
+                statements.append(statement)
+
+        sa.event.listen(engine, 'before_cursor_execute', on_execute)
+        try:
+            yield statements
+        finally:
+            sa.event.remove(engine, 'before_cursor_execute', on_execute)
+
+    return count
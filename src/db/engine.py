@@ -1,31 +1,166 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+import threading
+import time
+import weakref
 
+import sqlalchemy as sa
+from sqlalchemy import Engine
+from sqlalchemy.pool import QueuePool
+
+from utils.custom_logger import logger
 from utils.settings import settings
 
 
-class SingletonEngine:
-    _instance = None
+class EngineMetrics:
+    """Счётчики движка: сколько потоки ждут соединение из пула и сколько
+    запросов уходит в базу"""
 
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.engine = create_engine(*args, **kwargs)
-        return cls._instance
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        # Время ожидания соединения в пуле, секунды. Только для QueuePool
+        self.checkout_wait = 0.0
+        self.checkout_wait_max = 0.0
+        # Сколько раз соединение не дождались за DB_POOL_TIMEOUT
+        self.checkout_timeouts = 0
+        # Сколько соединений с базой открыто за всё время
+        self.connects = 0
+        self.queries = 0
 
-    def get_engine(self):
-        return self.engine
+    def add_wait(self, wait: float) -> None:
+        with self._lock:
+            self.checkout_wait += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
 
+    def add(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
 
-class SessionFactory:
-    def __init__(self):
-        self.engine = SingletonEngine(settings.DB_URL).get_engine()
-        self.Session = sessionmaker(bind=self.engine)
 
-    def __enter__(self):
-        self.session = self.Session()
-        return self.session
+class MeteredQueuePool(QueuePool):
+    """QueuePool, который меряет ожидание свободного соединения"""
+
+    metrics: EngineMetrics | None = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa.exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.add('checkout_timeouts')
+            raise
+        if self.metrics is not None:
+            self.metrics.add_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Engine.dispose() заменяет пул новым, счётчики переезжают в него
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+_metrics: 'weakref.WeakKeyDictionary[Engine, EngineMetrics]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def create_db_engine(url: str | None = None, **kwargs) -> Engine:
+    """Создаёт движок с настройками пула из settings и счётчиками.
+    kwargs переопределяют аргументы create_engine
+
+    SQLite в памяти живёт в одном соединении на поток (SingletonThreadPool),
+    настройки размера пула к нему не применяются.
+    """
+    url = sa.make_url(url or settings.DB_URL)
+    options = {'pool_pre_ping': settings.DB_POOL_PRE_PING}
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        options.update(
+            poolclass=MeteredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    options.update(kwargs)
+    engine = sa.create_engine(url, **options)
+
+    metrics = EngineMetrics()
+    _metrics[engine] = metrics
+    if isinstance(engine.pool, MeteredQueuePool):
+        engine.pool.metrics = metrics
+    sa.event.listen(engine, 'checkout', lambda *args: metrics.add('checkouts'))
+    sa.event.listen(engine, 'connect', lambda *args: metrics.add('connects'))
+    sa.event.listen(
+        engine, 'before_cursor_execute', lambda *args: metrics.add('queries')
+    )
+    return engine
+
+
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    # Соединения родителя нельзя использовать в дочернем процессе: пул
+    # забывает их, не закрывая, и открывает свои
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+def get_engine() -> Engine:
+    """Один движок на процесс, создаётся при первом обращении"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine()
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+        return _engine
+
+
+def get_engine_stats(engine: Engine | None = None) -> dict[str, float]:
+    """Состояние пула и счётчики движка процесса для логов"""
+    if engine is None:
+        engine = _engine
+    if engine is None:
+        return {}
+    metrics = _metrics.get(engine)
+    stats = {}
+    if metrics is not None:
+        stats.update(
+            checkouts=metrics.checkouts,
+            checkout_wait_avg_ms=round(
+                metrics.checkout_wait / max(metrics.checkouts, 1) * 1000, 2
+            ),
+            checkout_wait_max_ms=round(metrics.checkout_wait_max * 1000, 2),
+            checkout_timeouts=metrics.checkout_timeouts,
+            connects=metrics.connects,
+            queries=metrics.queries,
+        )
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+def start_stats_logging(
+    interval: float, stopped: threading.Event | None = None
+) -> threading.Thread:
+    """Раз в interval секунд пишет get_engine_stats() в лог из фонового потока.
+    Нужно процессам без своего цикла, например боту: его хэндлеры берут
+    соединения из пула в своих потоках. stopped останавливает поток"""
+    if stopped is None:
+        stopped = threading.Event()
+
+    def run():
+        while not stopped.wait(interval):
+            logger.info('DB engine: %s', get_engine_stats())
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        self.session.commit()
-        self.session.close()
+    thread = threading.Thread(target=run, name='db-engine-stats', daemon=True)
+    thread.start()
+    return thread
@@ -4,8 +4,8 @@ from logging.config import fileConfig
 from alembic import context
 from alembic.config import Config
 from alembic.script import ScriptDirectory
-from sqlalchemy import create_engine
 
+from db.engine import create_db_engine
 from db.models import Base
 from utils.settings import settings
 
@@ -46,7 +46,7 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
-    connectable = config.attributes.get('connection', create_engine(get_db_url()))
+    connectable = config.attributes.get('connection') or create_db_engine(get_db_url())
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
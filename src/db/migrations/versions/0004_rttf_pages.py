@@ -0,0 +1,25 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rttf_pages',
+        sa.Column('url', sa.String, primary_key=True),
+        sa.Column('page', sa.Text, nullable=False),
+        sa.Column('expires_at', sa.Integer, nullable=False),
+    )
+    op.create_index('ix_rttf_pages_expires_at', 'rttf_pages', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rttf_pages_expires_at', table_name='rttf_pages')
+    op.drop_table('rttf_pages')
@@ -0,0 +1,18 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tournaments', sa.Column('fingerprint', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tournaments', 'fingerprint')
@@ -0,0 +1,28 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'tournaments', sa.Column('last_update_dtm', sa.Integer(), nullable=True)
+    )
+    op.add_column('tournaments', sa.Column('change_rate', sa.Float(), nullable=True))
+    op.add_column('tournaments', sa.Column('priority', sa.Float(), nullable=True))
+    op.create_index(
+        'ix_tournaments_last_update_dtm', 'tournaments', ['last_update_dtm']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tournaments_last_update_dtm', table_name='tournaments')
+    op.drop_column('tournaments', 'priority')
+    op.drop_column('tournaments', 'change_rate')
+    op.drop_column('tournaments', 'last_update_dtm')
@@ -0,0 +1,31 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'subscription_changes',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('added', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        'ix_subscription_changes_created_at', 'subscription_changes', ['created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_subscription_changes_created_at', table_name='subscription_changes'
+    )
+    op.drop_table('subscription_changes')
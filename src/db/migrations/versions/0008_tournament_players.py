@@ -0,0 +1,85 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 500
+
+tournaments = sa.table(
+    'tournaments', sa.column('id', sa.Integer), sa.column('players', sa.String)
+)
+tournament_players = sa.table(
+    'tournament_players',
+    sa.column('tournament_id', sa.Integer),
+    sa.column('player_id', sa.Integer),
+    sa.column('status', sa.String),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tournament_players',
+        sa.Column(
+            'tournament_id',
+            sa.Integer(),
+            sa.ForeignKey('tournaments.id'),
+            primary_key=True,
+        ),
+        sa.Column('player_id', sa.Integer(), primary_key=True),
+        sa.Column('status', sa.String(), nullable=True),
+    )
+    op.create_index(
+        'ix_tournament_players_player_id',
+        'tournament_players',
+        ['player_id', 'tournament_id'],
+    )
+
+    # Перенос из строки '_1_,_2_'. Статусов в ней нет, они появятся при
+    # следующей обработке турнира
+    connection = op.get_bind()
+    rows = []
+    for tournament_id, players in connection.execute(
+        sa.select(tournaments.c.id, tournaments.c.players).where(
+            tournaments.c.players.isnot(None), tournaments.c.players != ''
+        )
+    ).all():
+        player_ids = {int(player.strip('_')) for player in players.split(',')}
+        rows.extend(
+            {'tournament_id': tournament_id, 'player_id': player_id, 'status': None}
+            for player_id in player_ids
+        )
+    for i in range(0, len(rows), CHUNK_SIZE):
+        connection.execute(tournament_players.insert(), rows[i : i + CHUNK_SIZE])
+
+    with op.batch_alter_table('tournaments') as batch_op:
+        batch_op.drop_column('players')
+
+
+def downgrade() -> None:
+    op.add_column('tournaments', sa.Column('players', sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    players = {}
+    for tournament_id, player_id in connection.execute(
+        sa.select(
+            tournament_players.c.tournament_id, tournament_players.c.player_id
+        ).order_by(tournament_players.c.tournament_id, tournament_players.c.player_id)
+    ).all():
+        players.setdefault(tournament_id, []).append(f'_{player_id}_')
+    for tournament_id, player_strs in players.items():
+        connection.execute(
+            tournaments.update()
+            .where(tournaments.c.id == tournament_id)
+            .values(players=','.join(player_strs))
+        )
+
+    op.drop_index(
+        'ix_tournament_players_player_id', table_name='tournament_players'
+    )
+    op.drop_table('tournament_players')
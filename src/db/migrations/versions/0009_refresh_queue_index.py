@@ -0,0 +1,25 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Частичный индекс: в него попадают только турниры, которые ещё обновляются
+    op.create_index(
+        'ix_tournaments_next_update_dtm',
+        'tournaments',
+        ['next_update_dtm'],
+        postgresql_where=sa.text('next_update_dtm IS NOT NULL'),
+        sqlite_where=sa.text('next_update_dtm IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tournaments_next_update_dtm', table_name='tournaments')
@@ -0,0 +1,27 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'refresh_events',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('tournament_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        'ix_refresh_events_created_at', 'refresh_events', ['created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_events_created_at', table_name='refresh_events')
+    op.drop_table('refresh_events')
@@ -0,0 +1,34 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Аренда сортирует по priority DESC NULLS FIRST, next_update_dtm: индекс
+    # только по next_update_dtm этот порядок не даёт
+    op.drop_index('ix_tournaments_next_update_dtm', table_name='tournaments')
+    op.create_index(
+        'ix_tournaments_refresh_queue',
+        'tournaments',
+        [sa.text('priority DESC'), 'next_update_dtm'],
+        postgresql_where=sa.text('next_update_dtm IS NOT NULL'),
+        sqlite_where=sa.text('next_update_dtm IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tournaments_refresh_queue', table_name='tournaments')
+    op.create_index(
+        'ix_tournaments_next_update_dtm',
+        'tournaments',
+        ['next_update_dtm'],
+        postgresql_where=sa.text('next_update_dtm IS NOT NULL'),
+        sqlite_where=sa.text('next_update_dtm IS NOT NULL'),
+    )
@@ -1,16 +1,23 @@
-from datetime import date, datetime, timedelta
+import json
+from datetime import date, datetime, time, timedelta
 
 import sqlalchemy as sa
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, relationship
 
 from utils.models import UserConfig
-from utils.settings import settings
-
-engine = sa.create_engine(settings.DB_URL)
 
 Base = declarative_base()
 
+# Сколько строк отправлять одним запросом при массовых вставках и IN (...).
+# Держит число параметров ниже лимитов драйверов
+BULK_CHUNK_SIZE = 500
+
+
+def chunked(items: list, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
 
 class DBUserConfig(Base):
     __tablename__ = 'user_configs'
@@ -58,16 +65,123 @@ class DBTournament(Base):
     # обрабатывающим обновление статусов игр
     # NULL означает, что апдейты по этому турниру больше не нужны
     next_update_dtm: int = sa.Column(sa.Integer, nullable=True)
-    players: str = sa.Column(sa.String, nullable=True)
+    # Хэш значимой части страницы при последней обработке, см.
+    # TournamentParser.get_fingerprint. Если страница не изменилась, турнир
+    # не парсится повторно
+    fingerprint: str = sa.Column(sa.String, nullable=True)
+    # Когда турнир обрабатывался последний раз. Бюджет считает DBRefreshEvent
+    last_update_dtm: int = sa.Column(sa.Integer, nullable=True, index=True)
+    # Сглаженная доля обработок, на которых страница менялась, 0..1
+    change_rate: float = sa.Column(sa.Float, nullable=True)
+    # Чем больше, тем раньше турнир берётся из просроченных, см. RefreshPolicy
+    priority: float = sa.Column(sa.Float, nullable=True)
+
+    __table_args__ = (
+        # Очередь обновлений: через пару дней после турнира почти у всех
+        # строк NULL, в индекс попадают только турниры, которые ещё обновляются.
+        # Порядок совпадает с ORDER BY в lease_expired: в Postgres DESC
+        # по умолчанию NULLS FIRST, так что сортировки нет
+        sa.Index(
+            'ix_tournaments_refresh_queue',
+            priority.desc(),
+            next_update_dtm,
+            postgresql_where=next_update_dtm.isnot(None),
+            sqlite_where=next_update_dtm.isnot(None),
+        ),
+    )
+    # Все участники турнира, см. DBTournamentPlayer
+    tournament_players = relationship(
+        'DBTournamentPlayer', cascade='all, delete-orphan'
+    )
+
+    def set_players(self, players: list[int], status: str = 'registered'):
+        self.tournament_players = [
+            DBTournamentPlayer(player_id=player_id, status=status)
+            for player_id in set(players)
+        ]
+
+    def get_start(self) -> datetime:
+        "Начало турнира. У старых записей в info_json нет времени, берём полночь"
+        info = json.loads(self.info_json or '{}')
+        if 'datetime' in info:
+            return datetime.strptime(info['datetime'], '%Y-%m-%d %H:%M')
+        return datetime.combine(self.tournament_date, time())
+
+    def get_players(self) -> list[int]:
+        "Обратное к set_players"
+        return [player.player_id for player in self.tournament_players]
 
-    def set_players(self, players: list[int]):
-        "Переводит список интов в строку"
-        players_str = ','.join([f'_{player_id}_' for player_id in players])
-        self.players = players_str
+    @classmethod
+    def insert_missing(cls, session: Session, rows: list[dict]) -> set[int]:
+        """Вставляет турниры, которых ещё нет в базе. Возвращает id вставленных
+
+        Запросов столько, сколько пачек по BULK_CHUNK_SIZE, а не турниров.
+        На Postgres это INSERT ... ON CONFLICT DO NOTHING RETURNING id,
+        на остальных базах (sqlite в тестах) SELECT id ... IN (...) и
+        вставка недостающих одним executemany
+        """
+        inserted = set()
+        table = cls.__table__
+        for chunk in chunked(rows):
+            if session.get_bind().dialect.name == 'postgresql':
+                from sqlalchemy.dialects import postgresql
+
+                stmt = (
+                    postgresql.insert(table)
+                    .values(chunk)
+                    .on_conflict_do_nothing(index_elements=[table.c.id])
+                    .returning(table.c.id)
+                )
+                inserted.update(session.execute(stmt).scalars())
+                continue
+            existing = set(
+                session.execute(
+                    sa.select(table.c.id).where(
+                        table.c.id.in_([row['id'] for row in chunk])
+                    )
+                ).scalars()
+            )
+            new_rows = [row for row in chunk if row['id'] not in existing]
+            if new_rows:
+                session.execute(sa.insert(table), new_rows)
+                inserted.update(row['id'] for row in new_rows)
+        return inserted
+
+    @classmethod
+    def lease_expired(
+        cls, session: Session, now: datetime, limit: int, lease_seconds: int
+    ) -> list[int]:
+        """Забирает до limit просроченных турниров в обработку. Возвращает их id
+
+        Ещё не обработанные турниры идут первыми, дальше по приоритету:
+        строки читаются в порядке индекса ix_tournaments_refresh_queue.
+        next_update_dtm выбранных сдвигается на lease_seconds вперёд, поэтому
+        другие воркеры их не возьмут, а если обработка упадёт, турниры снова
+        станут просроченными. Воркеры не пересекаются за счёт
+        DBRefreshEvent.lock: вызывающий держит её до коммита, поэтому
+        блокировки строк не нужны. Коммит - на вызывающем
+        """
+        ids = (
+            session.execute(
+                sa.select(cls.id)
+                .where(cls.next_update_dtm < now.timestamp())
+                .order_by(cls.priority.desc().nulls_first(), cls.next_update_dtm)
+                .limit(limit)
+            )
+            .scalars()
+            .all()
+        )
+        if ids:
+            session.query(cls).filter(cls.id.in_(ids)).update(
+                {cls.next_update_dtm: int(now.timestamp()) + lease_seconds},
+                synchronize_session=False,
+            )
+        return ids
 
     @classmethod
     def contains_player(cls, player_id: int):
-        return cls.players.like(f'%_{player_id}_%')
+        # EXISTS по индексу ix_tournament_players_player_id
+        return cls.tournament_players.any(DBTournamentPlayer.player_id == player_id)
 
     @classmethod
     def set_tournaments_update_dtm_by_player(
@@ -77,14 +191,93 @@ class DBTournament(Base):
         Турниры берутся не старше 3 дней от таймстемпа
         TODO: сделать это параметром
         """
-        tournaments = (
-            session.query(DBTournament)
-            .filter(DBTournament.contains_player(player_id))
-            .filter(DBTournament.tournament_date >= (ts.date() - timedelta(days=3)))
+        cls.set_tournaments_update_dtm_by_players(session, [player_id], ts)
+
+    @classmethod
+    def set_tournaments_update_dtm_by_players(
+        cls, session: Session, player_ids: list[int], ts: datetime = None
+    ) -> None:
+        """То же для нескольких игроков: один UPDATE на пачку игроков"""
+        for chunk in chunked(player_ids):
+            session.query(cls).filter(
+                cls.id.in_(
+                    sa.select(DBTournamentPlayer.tournament_id).where(
+                        DBTournamentPlayer.player_id.in_(chunk)
+                    )
+                ),
+                cls.tournament_date >= (ts.date() - timedelta(days=3)),
+            ).update(
+                {
+                    cls.next_update_dtm: ts.timestamp(),
+                    # У турнира появился новый подписчик: страницу нужно
+                    # разобрать заново, даже если она не изменилась
+                    cls.fingerprint: None,
+                },
+                synchronize_session='fetch',
+            )
+
+
+class DBTournamentPlayer(Base):
+    """Участники турнира: все записавшиеся и снявшиеся, а не только те, на
+    кого есть подписки. Заполняется при обработке страницы турнира"""
+
+    __tablename__ = 'tournament_players'
+    __table_args__ = (
+        # Турниры игрока без чтения самой таблицы
+        sa.Index('ix_tournament_players_player_id', 'player_id', 'tournament_id'),
+    )
+
+    tournament_id: int = sa.Column(
+        sa.Integer, sa.ForeignKey('tournaments.id'), primary_key=True
+    )
+    player_id: int = sa.Column(sa.Integer, primary_key=True)
+    # registered, refused или completed, см. Tournament.get_player_statuses.
+    # NULL - перенесено из старого поля tournaments.players
+    status: str = sa.Column(sa.String, nullable=True)
+
+    @classmethod
+    def replace(
+        cls, session: Session, tournament_id: int, statuses: dict[int, str]
+    ) -> None:
+        """Приводит участников турнира к statuses: один SELECT и по пачке
+        на вставки, обновления и удаления"""
+        existing = dict(
+            session.query(cls.player_id, cls.status)
+            .filter_by(tournament_id=tournament_id)
             .all()
         )
-        for tournament in tournaments:
-            tournament.next_update_dtm = ts.timestamp()
+        inserts, updates = [], []
+        for player_id, status in statuses.items():
+            if existing.get(player_id, ...) == status:
+                continue
+            row = {
+                'tournament_id': tournament_id,
+                'player_id': player_id,
+                'status': status,
+            }
+            (inserts if player_id not in existing else updates).append(row)
+        removed = [player_id for player_id in existing if player_id not in statuses]
+        if inserts:
+            session.execute(sa.insert(cls), inserts)
+        if updates:
+            session.execute(sa.update(cls), updates)
+        for chunk in chunked(removed):
+            session.query(cls).filter(
+                cls.tournament_id == tournament_id, cls.player_id.in_(chunk)
+            ).delete(synchronize_session=False)
+
+    @classmethod
+    def get_player_ids(
+        cls, session: Session, tournament_ids: list[int]
+    ) -> dict[int, list[int]]:
+        """Участники нескольких турниров: запрос на пачку турниров"""
+        player_ids = {tournament_id: [] for tournament_id in tournament_ids}
+        for chunk in chunked(tournament_ids):
+            for tournament_id, player_id in session.query(
+                cls.tournament_id, cls.player_id
+            ).filter(cls.tournament_id.in_(chunk)):
+                player_ids[tournament_id].append(player_id)
+        return player_ids
 
 
 class DBSubscription(Base):
@@ -117,52 +310,135 @@ class DBSubscription(Base):
 
         if not old_config.subscription_on and new_config.subscription_on:
             # subscription_on переключился с False на True - добавить ВСЕ друзей из new_config
-            for friend_id in new_config.friend_ids:
-                sub = cls(user_id=user_id, player_id=friend_id)
-                if (
-                    not session.query(cls)
-                    .filter_by(user_id=user_id, player_id=friend_id)
-                    .first()
-                ):
-                    sub = cls(user_id=user_id, player_id=friend_id)
-                    session.add(sub)
-                    # Сбрасываем время апдейта турниров, где есть друг
-                    DBTournament.set_tournaments_update_dtm_by_player(
-                        session, friend_id, now
-                    )
-            return
+            added_ids, removed_ids = new_config.friend_ids, set()
         elif old_config.subscription_on and not new_config.subscription_on:
             # subscription_on переключился с True на False - удалить все подписки для этого пользователя
-            session.query(cls).filter_by(user_id=user_id).delete()
+            added_ids, removed_ids = set(), None
+        elif not new_config.subscription_on:
             return
+        else:
+            # Если статус subscription_on не изменился, обрабатываем разницу между списками друзей
+            added_ids = new_config.friend_ids - old_config.friend_ids
+            removed_ids = old_config.friend_ids - new_config.friend_ids
 
-        if not new_config.subscription_on:
-            return
+        # Все подписки пользователя одним запросом, дальше разница в памяти
+        # и пачки вставок и удалений. removed_ids = None - удалить все
+        existing = set(
+            session.execute(
+                sa.select(cls.player_id).where(cls.user_id == user_id)
+            ).scalars()
+        )
+        to_add = sorted(added_ids - existing)
+        if removed_ids is None:
+            to_remove = sorted(existing)
+        else:
+            to_remove = sorted(removed_ids & existing)
+
+        if to_add:
+            session.execute(
+                sa.insert(cls),
+                [{'user_id': user_id, 'player_id': player_id} for player_id in to_add],
+            )
+            DBSubscriptionChange.record_many(session, user_id, to_add, True, now)
+            # Сбрасываем время апдейта турниров, где есть новые друзья
+            DBTournament.set_tournaments_update_dtm_by_players(session, to_add, now)
+        if to_remove:
+            for chunk in chunked(to_remove):
+                session.query(cls).filter(
+                    cls.user_id == user_id, cls.player_id.in_(chunk)
+                ).delete(synchronize_session=False)
+            DBSubscriptionChange.record_many(session, user_id, to_remove, False, now)
+
+
+class DBSubscriptionChange(Base):
+    """Журнал изменений подписок. По нему долгоживущие процессы обновляют
+    свой индекс подписок (services.subscription_index), не перечитывая
+    всю таблицу subscriptions"""
+
+    __tablename__ = 'subscription_changes'
+
+    id: int = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    user_id: int = sa.Column(sa.Integer, nullable=False)
+    player_id: int = sa.Column(sa.Integer, nullable=False)
+    # True - подписка появилась, False - удалена
+    added: bool = sa.Column(sa.Boolean, nullable=False)
+    created_at: int = sa.Column(sa.Integer, nullable=False, index=True)
+
+    @classmethod
+    def record_many(
+        cls,
+        session: Session,
+        user_id: int,
+        player_ids: list[int],
+        added: bool,
+        now: datetime,
+    ) -> None:
+        session.execute(
+            sa.insert(cls),
+            [
+                {
+                    'user_id': user_id,
+                    'player_id': player_id,
+                    'added': added,
+                    'created_at': int(now.timestamp()),
+                }
+                for player_id in player_ids
+            ],
+        )
+
+    @classmethod
+    def delete_old(cls, session: Session, before: datetime) -> int:
+        return (
+            session.query(cls)
+            .filter(cls.created_at < before.timestamp())
+            .delete(synchronize_session=False)
+        )
 
-        # Если статус subscription_on не изменился, обрабатываем разницу между списками друзей:
-        added_ids = new_config.friend_ids - old_config.friend_ids
-        for added_id in added_ids:
-            if (
-                not session.query(cls)
-                .filter_by(user_id=user_id, player_id=added_id)
-                .first()
-            ):
-                sub = cls(user_id=user_id, player_id=added_id)
-                session.add(sub)
-                # Сбрасываем время апдейта турниров, где есть друг
-                DBTournament.set_tournaments_update_dtm_by_player(
-                    session, added_id, now
-                )
 
-        removed_ids = old_config.friend_ids - new_config.friend_ids
-        for removed_id in removed_ids:
-            sub = (
-                session.query(cls)
-                .filter_by(user_id=user_id, player_id=removed_id)
-                .first()
+class DBRefreshEvent(Base):
+    """Обработки турниров за последний час: счётчик часового бюджета
+    REFRESH_BUDGET_PER_HOUR, общий для всех воркеров. Строка на каждую
+    обработку, поэтому турнир, обработанный за час четыре раза, считается
+    четыре раза"""
+
+    __tablename__ = 'refresh_events'
+
+    # Окно бюджета, секунды
+    WINDOW = 3600
+    # Ключ pg_advisory_xact_lock, которым воркеры по очереди берут бюджет
+    LOCK_KEY = 0x52545446
+
+    id: int = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    tournament_id: int = sa.Column(sa.Integer, nullable=False)
+    created_at: int = sa.Column(sa.Integer, nullable=False, index=True)
+
+    @classmethod
+    def lock(cls, session: Session) -> None:
+        """Блокировка до конца транзакции: подсчёт бюджета, аренда турниров и
+        запись обработок идут без гонки между воркерами. На sqlite записи и
+        так идут по одной, блокировка не нужна"""
+        if session.get_bind().dialect.name == 'postgresql':
+            session.execute(sa.select(sa.func.pg_advisory_xact_lock(cls.LOCK_KEY)))
+
+    @classmethod
+    def count_used(cls, session: Session, now: datetime) -> int:
+        """Сколько обработок было за последний час. Более старые удаляются"""
+        since = int(now.timestamp()) - cls.WINDOW
+        session.query(cls).filter(cls.created_at < since).delete(
+            synchronize_session=False
+        )
+        return session.query(cls).filter(cls.created_at >= since).count()
+
+    @classmethod
+    def record(cls, session: Session, tournament_ids: list[int], now: datetime) -> None:
+        if tournament_ids:
+            session.execute(
+                sa.insert(cls),
+                [
+                    {'tournament_id': tournament_id, 'created_at': int(now.timestamp())}
+                    for tournament_id in tournament_ids
+                ],
             )
-            if sub:
-                session.delete(sub)
 
 
 class DBPlayerTournament(Base):
@@ -173,3 +449,14 @@ class DBPlayerTournament(Base):
         sa.Integer, sa.ForeignKey('tournaments.id'), primary_key=True
     )
     info_json: str = sa.Column(sa.String)
+
+
+class DBPage(Base):
+    """Кэш скачанных страниц RTTF, общий для бота и кронов"""
+
+    __tablename__ = 'rttf_pages'
+
+    url: str = sa.Column(sa.String, primary_key=True)
+    page: str = sa.Column(sa.Text, nullable=False)
+    # Таймстемп, после которого страница считается устаревшей
+    expires_at: int = sa.Column(sa.Integer, nullable=False, index=True)
@@ -1,12 +1,12 @@
 from collections.abc import Generator
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
 
-from utils.settings import settings
+from db.engine import get_engine
 
-engine = create_engine(settings.DB_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Движок создаётся при первой сессии, а не при импорте: create_engine
+# загружает драйвер базы, а режимам без базы он не нужен
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 
 @contextmanager
@@ -15,6 +15,8 @@ def open_session() -> Generator[Session, None, None]:
     Создает новую сессию для взаимодействия с базой данных.
     Автоматически закрывает сессию по завершении контекста.
     """
+    if SessionLocal.kw.get('bind') is None:
+        SessionLocal.configure(bind=get_engine())
     session = SessionLocal()
     try:
         yield session  # Возвращаем сессию
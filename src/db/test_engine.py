@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+import db.engine
+from db.engine import (
+    MeteredQueuePool,
+    create_db_engine,
+    get_engine_stats,
+    start_stats_logging,
+)
+
+
+def test_engine_pool_metrics(tmp_path):
+    engine = create_db_engine(
+        f'sqlite:///{tmp_path / "test.db"}',
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    assert isinstance(engine.pool, MeteredQueuePool)
+    with engine.connect() as connection:
+        connection.execute(sa.text('SELECT 1'))
+        connection.execute(sa.text('SELECT 2'))
+        # Единственное соединение занято: второй поток его не дождётся
+        with pytest.raises(sa.exc.TimeoutError):
+            engine.connect()
+        stats = get_engine_stats(engine)
+        assert stats['checked_out'] == 1
+    stats = get_engine_stats(engine)
+    assert stats['queries'] == 2
+    assert stats['checkouts'] == 1
+    assert stats['connects'] == 1
+    assert stats['checkout_timeouts'] == 1
+    assert stats['pool_size'] == 1
+
+    # После dispose счётчики продолжаются в новом пуле
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.execute(sa.text('SELECT 1'))
+    stats = get_engine_stats(engine)
+    assert stats['queries'] == 3
+    assert stats['connects'] == 2
+
+
+def test_memory_engine_keeps_default_pool():
+    engine = create_db_engine('sqlite:///:memory:')
+    assert not isinstance(engine.pool, MeteredQueuePool)
+    with engine.connect() as connection:
+        connection.execute(sa.text('SELECT 1'))
+    stats = get_engine_stats(engine)
+    assert stats['queries'] == 1
+    assert 'pool_size' not in stats
+
+
+def test_stats_are_logged_periodically(monkeypatch):
+    logged = []
+    logged_twice = threading.Event()
+
+    def info(message, *args):
+        logged.append(message % args)
+        if len(logged) >= 2:
+            logged_twice.set()
+
+    monkeypatch.setattr(db.engine.logger, 'info', info)
+    stopped = threading.Event()
+    thread = start_stats_logging(0.01, stopped)
+    assert logged_twice.wait(1)
+    stopped.set()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert logged[0].startswith('DB engine: ')
@@ -7,10 +7,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from db.models import (
+    BULK_CHUNK_SIZE,
     Base,
     DBPlayerTournament,
     DBSubscription,
     DBTournament,
+    DBTournamentPlayer,
     DBUserConfig,
 )
 from utils.models import UserConfig
@@ -74,6 +76,26 @@ def test_tournament_model(test_db):
     assert found[0].id == 1
 
 
+def test_tournament_players_exact_match(test_db):
+    tournament = DBTournament(id=4, tournament_date=date(2023, 10, 26), info_json='{}')
+    # С LIKE '%_2_%' по строке '_12_,_21_' игрок 2 находился бы и здесь
+    tournament.set_players([12, 21])
+    test_db.add(tournament)
+    test_db.commit()
+
+    found = test_db.query(DBTournament).filter(DBTournament.contains_player(2)).all()
+    assert [t.id for t in found] == [1]
+
+    DBTournamentPlayer.replace(test_db, 4, {12: 'refused', 30: 'registered'})
+    test_db.commit()
+    test_db.expire_all()
+    rows = test_db.query(DBTournamentPlayer).filter_by(tournament_id=4).all()
+    assert {(row.player_id, row.status) for row in rows} == {
+        (12, 'refused'),
+        (30, 'registered'),
+    }
+
+
 def test_subscription_model(test_db):
     user_config = UserConfig(id=2, username='123')
     db_user_config = DBUserConfig(id=user_config.id, config=user_config.to_dict())
@@ -188,3 +210,86 @@ def test_process_subs_diff_incremental(test_db):
     tournament = test_db.query(DBTournament).filter_by(id=1001).first()
     assert tournament.next_update_dtm is not None
     assert abs(tournament.next_update_dtm - now.timestamp()) < 1.0
+
+
+def test_tournament_insert_missing(test_db, statement_counter):
+    test_db.add(DBTournament(id=5000, tournament_date=date(2023, 10, 26)))
+    test_db.commit()
+    rows = [
+        {'id': 5000 + i, 'tournament_date': date(2023, 10, 26), 'info_json': '{}'}
+        for i in range(BULK_CHUNK_SIZE + 10)
+    ]
+
+    with statement_counter(engine) as statements:
+        inserted = DBTournament.insert_missing(test_db, rows)
+        test_db.commit()
+
+    assert inserted == {row['id'] for row in rows[1:]}
+    # На каждую пачку один SELECT и один INSERT, а не по запросу на турнир
+    assert len(statements) == 4
+    assert DBTournament.insert_missing(test_db, rows) == set()
+
+
+def test_tournament_lease_expired(test_db):
+    now = datetime(2023, 10, 27, 12, 0, 0)
+    for tournament_id, priority in ((6001, 1.0), (6002, None), (6003, 5.0)):
+        test_db.add(
+            DBTournament(
+                id=tournament_id,
+                tournament_date=now.date(),
+                next_update_dtm=now.timestamp() - 60,
+                priority=priority,
+            )
+        )
+    test_db.commit()
+
+    # Новые турниры первыми, дальше по приоритету
+    assert DBTournament.lease_expired(test_db, now, 2, 600) == [6002, 6003]
+    test_db.commit()
+    # Взятые в аренду турниры не выдаются повторно, пока аренда не истекла
+    assert DBTournament.lease_expired(test_db, now, 2, 600) == [6001]
+    assert DBTournament.lease_expired(test_db, now, 2, 600) == []
+    later = datetime(2023, 10, 27, 12, 11, 0)
+    assert {6001, 6002, 6003} <= set(
+        DBTournament.lease_expired(test_db, later, 10, 600)
+    )
+    test_db.rollback()
+
+
+def test_process_subs_diff_in_bulk(test_db, statement_counter):
+    user_id = 13
+    friend_ids = set(range(700, 750))
+    now = datetime(2023, 10, 27, 12, 0, 0)
+    tournament = DBTournament(id=1002, tournament_date=now.date(), info_json='{}')
+    tournament.set_players([710, 720])
+    test_db.add(tournament)
+    test_db.add(DBSubscription(user_id=user_id, player_id=700))
+    test_db.commit()
+
+    with statement_counter(engine) as statements:
+        DBSubscription.process_subs_diff(
+            test_db,
+            UserConfig(id=user_id, friend_ids=friend_ids),
+            UserConfig(id=user_id, friend_ids=friend_ids, subscription_on=True),
+            now=now,
+        )
+        test_db.flush()
+    test_db.commit()
+
+    # Чтение подписок, вставка подписок, вставка в журнал, перенос турниров
+    assert len(statements) == 4
+    subs = test_db.query(DBSubscription).filter_by(user_id=user_id).all()
+    assert {sub.player_id for sub in subs} == friend_ids
+    tournament = test_db.query(DBTournament).filter_by(id=1002).one()
+    assert tournament.next_update_dtm == now.timestamp()
+
+    with statement_counter(engine) as statements:
+        DBSubscription.process_subs_diff(
+            test_db,
+            UserConfig(id=user_id, friend_ids=friend_ids, subscription_on=True),
+            UserConfig(id=user_id, friend_ids=friend_ids),
+        )
+        test_db.flush()
+    test_db.commit()
+    assert len(statements) == 3
+    assert test_db.query(DBSubscription).filter_by(user_id=user_id).count() == 0
@@ -1,35 +1,120 @@
-import sys
 import argparse
 import datetime
-from bot.bot_setup import bot_context
 from utils.custom_logger import logger
-from clients.client import RTTFClient
-from parsers.tournaments_parser import TournamentsParser
-from utils.models import DateRange
-from services.player_service import PlayerService
+from utils.job_lock import job_lock
+from utils.settings import settings
+
+# Модули режимов импортируются внутри функций: каждый режим загружает только
+# то, чем пользуется (замер - python -m benchmarks.startup)
+
+
+def log_client_stats():
+    from clients.client import RTTFClient
+    from db.engine import get_engine_stats
+
+    logger.info('DB engine: %s', get_engine_stats())
+    logger.info('RTTF connections: %s', RTTFClient.get_connection_stats())
+    logger.info('RTTF page cache: %s', RTTFClient.page_cache.get_stats())
+    logger.info('RTTF rate limit: %.2f rps', RTTFClient.rate_limiter.get_rate())
+
+
+def parse_tournaments():
+    from clients.page_cache import PageCache
+    from db.models import DBSubscriptionChange
+    from db.session_factory import open_session
+    from services.player_service import PlayerService
+
+    player_service = PlayerService()
+    tournaments_data = player_service.update_tournaments()
+    logger.info('\n'.join(map(str, tournaments_data)))
+    logger.info('Expired cached pages deleted: %s', PageCache.delete_expired())
+    with open_session() as session:
+        deleted = DBSubscriptionChange.delete_old(
+            session,
+            datetime.datetime.now()
+            - datetime.timedelta(seconds=settings.SUBSCRIPTION_CHANGES_TTL),
+        )
+    logger.info('Old subscription changes deleted: %s', deleted)
+    log_client_stats()
+
+
+def process_tournaments_batch():
+    from services.player_service import PlayerService
+
+    player_service = PlayerService()
+    updates = player_service.process_batch_and_notify(
+        batch_size=settings.WORKER_BATCH_SIZE
+    )
+    logger.info(updates)
+    log_client_stats()
+
+
+def run_once(name, func):
+    """Разовый запуск из крона, не пересекается с тем же заданием воркера"""
+    with job_lock(name) as acquired:
+        if not acquired:
+            logger.warning('Job %s is already running', name)
+            return
+        func()
+
+
+def create_worker():
+    from services.worker import Job, Worker
+
+    return Worker(
+        [
+            Job(
+                'parse_tournaments',
+                parse_tournaments,
+                # Один запуск в каждый из часов
+                interval=3600,
+                hours=set(settings.WORKER_DISCOVERY_HOURS),
+            ),
+            Job(
+                'process_tournaments_batch',
+                process_tournaments_batch,
+                interval=settings.WORKER_BATCH_INTERVAL,
+                hours=set(settings.WORKER_BATCH_HOURS),
+                # Турниры батча берутся в аренду, воркеры не мешают друг другу
+                exclusive=False,
+            ),
+        ]
+    )
+
+
+def run_bot():
+    # Хэндлеры бота нужны только для polling, воркеру и крону они ни к чему
+    from bot.bot_setup import bot_context
+    from db.engine import get_engine_stats, start_stats_logging
+
+    logger.info('Bot started')
+    if settings.DB_STATS_LOG_INTERVAL > 0:
+        start_stats_logging(settings.DB_STATS_LOG_INTERVAL)
+    bot_context.bot.infinity_polling(
+        # timeout=10,
+        # long_polling_timeout=5,
+    )
+    logger.info('Bot finished')
+    logger.info('DB engine: %s', get_engine_stats())
 
 
 def main():
     parser = argparse.ArgumentParser(description='Tournament Parser')
     parser.add_argument('--parse-tournaments', action='store_true', help='Parse tournaments from two days before to three days after today')
     parser.add_argument('--process-tournaments-batch', action='store_true', help='Process tournaments batch using process_batch_and_notify with batch size 10')
+    parser.add_argument('--worker', action='store_true', help='Run tournaments parsing and batch processing on schedule in one process')
     args = parser.parse_args()
 
     if args.parse_tournaments:
-        player_service = PlayerService()
-        tournaments_data = player_service.update_tournaments()
-        logger.info('\n'.join(map(str, tournaments_data)))
+        run_once('parse_tournaments', parse_tournaments)
     elif args.process_tournaments_batch:
-        player_service = PlayerService()
-        updates = player_service.process_batch_and_notify(batch_size=25)
-        logger.info(updates)
+        # Без job_lock: батчи из крона и воркеров разбирают очередь параллельно,
+        # см. DBTournament.lease_expired
+        process_tournaments_batch()
+    elif args.worker:
+        create_worker().run()
     else:
-        logger.info('Bot started')
-        bot_context.bot.infinity_polling(
-            # timeout=10,
-            # long_polling_timeout=5,
-        )
-        logger.info('Bot finished')
+        run_bot()
 
 
 if __name__ == '__main__':
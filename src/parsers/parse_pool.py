@@ -0,0 +1,128 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from utils.custom_logger import logger
+from utils.settings import settings
+
+if TYPE_CHECKING:
+    from parsers.parser import Parser
+
+T = TypeVar('T')
+
+# Модули, которые форк-сервер импортирует один раз, а воркеры получают уже
+# загруженными: первый же разбор в новом воркере идёт без импортов
+PRELOAD_MODULES = [
+    'parsers.player_parser',
+    'parsers.players_parser',
+    'parsers.tournament_parser',
+    'parsers.tournaments_parser',
+]
+
+
+def _parse_page(
+    parser: type['Parser'], page: str | bytes, options: dict[str, Any]
+) -> Any:
+    return parser.parse_data(page, **options)
+
+
+def _warm_up() -> None:
+    for module in PRELOAD_MODULES:
+        __import__(module)
+
+
+class ParsePool:
+    """Пул процессов для парсинга страниц.
+
+    Парсинг - чистый python и упирается в GIL, поэтому пачки страниц
+    разбираются в отдельных процессах (settings.PARSE_WORKERS, не путать с
+    MAX_WORKERS для запросов). Пул создаётся при первом использовании и живёт
+    до конца процесса, воркеры остаются прогретыми между вызовами.
+    Страницы передаются в воркеры как есть, обратно приходят dataclass'ы
+    результата. PARSE_WORKERS=0 - парсинг в текущем процессе.
+    Если воркер умер (OOM killer, segfault), пул пересоздаётся.
+    """
+
+    _executor: ProcessPoolExecutor | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                # fork небезопасен в процессе с потоками (бот, http клиенты),
+                # воркеры запускаются из отдельного форк-сервера
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(PRELOAD_MODULES)
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=settings.PARSE_WORKERS,
+                    mp_context=context,
+                    initializer=_warm_up,
+                )
+                logger.info(
+                    'Parse pool started with %s workers', settings.PARSE_WORKERS
+                )
+            return cls._executor
+
+    @classmethod
+    def map(
+        cls,
+        parser: type['Parser'],
+        pages: list[str | bytes],
+        options: dict[str, Any] | None = None,
+    ) -> list[Any]:
+        """parser.parse_data(page, **options) для каждой страницы, порядок
+        сохраняется"""
+        options = options or {}
+        if settings.PARSE_WORKERS <= 0 or len(pages) < 2:
+            return [parser.parse_data(page, **options) for page in pages]
+        return cls._run(
+            lambda executor: list(
+                executor.map(
+                    _parse_page, [parser] * len(pages), pages, [options] * len(pages)
+                )
+            )
+        )
+
+    @classmethod
+    def apply(
+        cls,
+        parser: type['Parser'],
+        page: str | bytes,
+        options: dict[str, Any] | None = None,
+    ) -> Any:
+        """Разбор одной страницы в пуле. Для потоков, которые получают
+        страницы по одной: несколько таких потоков загружают все воркеры"""
+        options = options or {}
+        if settings.PARSE_WORKERS <= 0:
+            return parser.parse_data(page, **options)
+        return cls._run(
+            lambda executor: executor.submit(
+                _parse_page, parser, page, options
+            ).result()
+        )
+
+    @classmethod
+    def _run(cls, func: Callable[[ProcessPoolExecutor], T]) -> T:
+        """func(executor). Сломанный пул пересоздаётся, и вызов повторяется
+        один раз"""
+        executor = cls.get_executor()
+        try:
+            return func(executor)
+        except BrokenProcessPool:
+            logger.warning('Parse pool is broken, restarting')
+            with cls._lock:
+                # Другой поток мог уже пересоздать пул
+                if cls._executor is executor:
+                    cls._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            return func(cls.get_executor())
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown()
+                cls._executor = None
@@ -1,18 +1,67 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic
+from functools import cache
+from typing import Any, TypeVar, Generic
 
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+from parsers.parse_pool import ParsePool
 from utils.custom_logger import logger
+from utils.settings import settings
+from utils.single_flight import SingleFlight
 
 T = TypeVar('T')
 
+# Общий для всех парсеров: одинаковые страницы, которые разбираются
+# одновременно (например, несколько пользователей запросили одно и то же),
+# парсятся один раз
+_single_flight = SingleFlight()
+
+# Парсер, на который откатываемся, если выбранного нет в окружении
+FALLBACK_BACKEND = 'html.parser'
+
+
+@cache
+def resolve_backend(backend: str) -> str:
+    """Проверяет, что бэкенд BeautifulSoup установлен, иначе отдаёт html.parser"""
+    if builder_registry.lookup(backend) is None:
+        logger.warning(
+            f'HTML backend {backend} is not available, using {FALLBACK_BACKEND}'
+        )
+        return FALLBACK_BACKEND
+    return backend
+
 
 class Parser(ABC, Generic[T]):
     base_url = 'https://m.rttf.ru/'
+    # Бэкенд BeautifulSoup. None - берётся settings.HTML_PARSER
+    backend: str | None = None
+
+    @classmethod
+    def get_backend(cls) -> str:
+        return resolve_backend(cls.backend or settings.HTML_PARSER)
+
+    @classmethod
+    def make_soup(
+        cls, page: str | bytes, parse_only: SoupStrainer | None = None
+    ) -> BeautifulSoup:
+        """Строит дерево страницы выбранным бэкендом.
+
+        Байты (response.content) отдаются бэкенду как есть: lxml декодирует
+        их сам, без промежуточной python-строки. parse_only оставляет в дереве
+        только нужные элементы.
+        """
+        if isinstance(page, bytes):
+            return BeautifulSoup(
+                page, cls.get_backend(), parse_only=parse_only, from_encoding='utf-8'
+            )
+        return BeautifulSoup(page, cls.get_backend(), parse_only=parse_only)
 
     @classmethod
-    def parse_data(cls, page: str) -> T | None:
+    def parse_data(cls, page: str | bytes, **options: Any) -> T | None:
+        """options передаются в _parse_data конкретного парсера"""
         try:
-            parse_result = cls._parse_data(page)
+            parse_result = cls._parse_data(page, **options)
             parse_result_str = str(parse_result)
             parse_result_representation = (
                 parse_result_str
@@ -25,7 +74,47 @@ class Parser(ABC, Generic[T]):
             logger.error(f'Error while parsing page: {e}')
             return None
 
+    @classmethod
+    def parse_data_shared(cls, page: str | bytes) -> T | None:
+        """parse_data, разделяющий результат с одновременными вызовами.
+
+        Результат общий для всех вызвавших, его нельзя изменять.
+        """
+        return _single_flight.do((cls, page), lambda: cls.parse_data(page))
+
+    @classmethod
+    def parse_many(cls, pages: list[str | bytes], **options: Any) -> list[T | None]:
+        """parse_data для пачки страниц в пуле процессов, см. ParsePool"""
+        return ParsePool.map(cls, pages, options)
+
+    @classmethod
+    def parse_many_shared(
+        cls, pages: list[str | bytes], **options: Any
+    ) -> list[T | None]:
+        """parse_many, разделяющий результаты с одновременными вызовами.
+
+        Одинаковые страницы с одинаковыми options разбираются один раз, даже
+        если их одновременно разбирают несколько пользователей. В пул уходят
+        только страницы, которые ещё никто не разбирает. Результаты общие,
+        их нельзя изменять.
+        """
+        options_key = tuple(
+            sorted(
+                (name, frozenset(value) if isinstance(value, set) else value)
+                for name, value in options.items()
+            )
+        )
+        return _single_flight.do_many(
+            [(cls, page, options_key) for page in pages],
+            lambda keys: ParsePool.map(cls, [key[1] for key in keys], options),
+        )
+
+    @classmethod
+    def parse_pooled(cls, page: str | bytes, **options: Any) -> T | None:
+        """parse_data одной страницы в пуле процессов, см. ParsePool.apply"""
+        return ParsePool.apply(cls, page, options)
+
     @classmethod
     @abstractmethod
-    def _parse_data(cls, page: str) -> T:
+    def _parse_data(cls, page: str | bytes) -> T:
         pass
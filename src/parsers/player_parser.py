@@ -1,13 +1,11 @@
-from bs4 import BeautifulSoup
-
 from parsers.parser import Parser
 from utils.models import Player
 
 
 class PlayerParser(Parser):
     @classmethod
-    def _parse_data(cls, page: str) -> Player:
-        soup = BeautifulSoup(page, 'html.parser')
+    def _parse_data(cls, page: str | bytes) -> Player:
+        soup = cls.make_soup(page)
 
         # Парсинг ID игрока
         player_id = None
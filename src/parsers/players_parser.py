@@ -1,13 +1,11 @@
-from bs4 import BeautifulSoup
-
 from parsers.parser import Parser
 from utils.models import Player
 
 
 class PlayersParser(Parser):
     @classmethod
-    def _parse_data(cls, page: str) -> list[Player]:
-        soup = BeautifulSoup(page, 'html.parser')
+    def _parse_data(cls, page: str | bytes) -> list[Player]:
+        soup = cls.make_soup(page)
         players_data = []
 
         # Находим таблицу с игроками
@@ -0,0 +1,55 @@
+import glob
+import os
+import signal
+import time
+
+from parsers.parse_pool import ParsePool
+from parsers.tournament_parser import TournamentParser
+from utils.settings import settings
+
+
+def read_pages():
+    pages = []
+    for path in sorted(glob.glob('htmls/**/tournament/*.html', recursive=True)):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+def test_pool_matches_inline_parsing(monkeypatch):
+    pages = read_pages() + ['']
+    monkeypatch.setattr(settings, 'PARSE_WORKERS', 0)
+    expected = TournamentParser.parse_many(pages)
+    assert expected[-1] is None
+    # Повторы страниц в пачке разбираются один раз
+    assert TournamentParser.parse_many_shared(pages + pages[:1]) == (
+        expected + expected[:1]
+    )
+
+    monkeypatch.setattr(settings, 'PARSE_WORKERS', 2)
+    try:
+        assert TournamentParser.parse_many(pages) == expected
+        # Повторный вызов идёт в те же, уже прогретые воркеры
+        executor = ParsePool.get_executor()
+        assert TournamentParser.parse_many(pages[:2]) == expected[:2]
+        assert ParsePool.get_executor() is executor
+    finally:
+        ParsePool.shutdown()
+
+
+def test_pool_recovers_after_worker_death(monkeypatch):
+    pages = read_pages()[:2]
+    monkeypatch.setattr(settings, 'PARSE_WORKERS', 2)
+    try:
+        expected = TournamentParser.parse_many(pages)
+        executor = ParsePool.get_executor()
+        # Воркер убит, например, OOM killer
+        os.kill(next(iter(executor._processes)), signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while not executor._broken and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert TournamentParser.parse_many(pages) == expected
+        assert TournamentParser.parse_pooled(pages[0]) == expected[0]
+        assert ParsePool.get_executor() is not executor
+    finally:
+        ParsePool.shutdown()
@@ -0,0 +1,28 @@
+import glob
+
+import pytest
+
+from parsers.player_parser import PlayerParser
+from parsers.players_parser import PlayersParser
+from parsers.tournament_parser import TournamentParser
+from parsers.tournaments_parser import TournamentsParser
+
+PARSERS = [TournamentParser, TournamentsParser, PlayerParser, PlayersParser]
+
+
+@pytest.mark.parametrize('path', sorted(glob.glob('htmls/**/*.html', recursive=True)))
+def test_backends_give_same_result(path, monkeypatch):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    page = raw.decode('utf-8')
+    for parser in PARSERS:
+        monkeypatch.setattr(parser, 'backend', 'html.parser')
+        expected = parser.parse_data(page)
+        monkeypatch.setattr(parser, 'backend', 'lxml')
+        assert parser.parse_data(page) == expected
+        assert parser.parse_data(raw) == expected
+
+
+def test_unknown_backend_falls_back(monkeypatch):
+    monkeypatch.setattr(TournamentParser, 'backend', 'no-such-parser')
+    assert TournamentParser.get_backend() == 'html.parser'
@@ -20,3 +20,17 @@ def test_online_tournament():
     parse_result = TournamentParser().parse_data(page)
     assert parse_result.is_online is True
     assert parse_result.is_completed is False
+
+
+def test_players_of_interest():
+    with open('htmls/2025-04-12/tournament/168577.html', 'r') as f:
+        page = f.read()
+    full = TournamentParser.parse_data(page)
+    filtered = TournamentParser.parse_data(page, players_of_interest={124031})
+    # Строки остальных игроков пропущены, но их id на месте
+    assert filtered.registered_players == []
+    assert [player.id for player in filtered.refused_players] == [124031]
+    assert filtered.player_ids == full.player_ids
+    assert set(full.player_ids) == {
+        player.id for player in full.registered_players + full.refused_players
+    }
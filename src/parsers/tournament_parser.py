@@ -1,15 +1,70 @@
+import hashlib
 import re
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 
 from parsers.parser import Parser
 from utils.models import Player, PlayerResult, Tournament
 
 
+# Части страницы турнира, от которых зависит результат парсинга
+FINGERPRINT_PARTS_RE = re.compile(
+    r'<h1>.*?</h1>|<ul id="tabs".*?</ul>|<table class="tablesort[^"]*">.*?</table>',
+    re.S,
+)
+FORECASTS_SECTION_RE = re.compile(r'<section class="tour-forecasts".*?</section>', re.S)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _attr_values(value) -> list[str]:
+    # Бэкенды отдают многозначные атрибуты то строкой, то списком
+    if value is None:
+        return []
+    return value.split() if isinstance(value, str) else list(value)
+
+
+def _is_tournament_part(name: str, attrs: dict) -> bool:
+    if name == 'h1':
+        return True
+    if name == 'ul':
+        return attrs.get('id') == 'tabs'
+    if name == 'table':
+        return 'tablesort' in _attr_values(attrs.get('class'))
+    if name == 'a':
+        return 'href' in attrs and 'nofollow' in _attr_values(attrs.get('rel'))
+    return False
+
+
+# В дерево попадают только заголовок, вкладки, таблицы игроков и ссылки
+# rel=nofollow (из первой берётся id турнира). Остальная страница
+# (описание, комментарии) пропускается на этапе построения дерева
+TOURNAMENT_STRAINER = SoupStrainer(_is_tournament_part)
+
+
 class TournamentParser(Parser[Tournament]):
     @classmethod
-    def _parse_data(cls, page: str) -> Tournament:
-        soup = BeautifulSoup(page, 'html.parser')
+    def get_fingerprint(cls, page: str) -> str | None:
+        """Хэш заголовка, вкладок и таблиц игроков страницы турнира.
+
+        Считается регулярками без построения дерева, поэтому сильно дешевле
+        парсинга. Таблица прогнозов не учитывается, она не влияет на результат.
+        Возвращает None, если на странице нет ожидаемых элементов.
+        """
+        page = FORECASTS_SECTION_RE.sub('', page)
+        parts = FINGERPRINT_PARTS_RE.findall(page)
+        if not parts:
+            return None
+        normalized = WHITESPACE_RE.sub(' ', ''.join(parts))
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _parse_data(
+        cls, page: str | bytes, players_of_interest: set[int] | None = None
+    ) -> Tournament:
+        """players_of_interest - если задан, Player и PlayerResult строятся
+        только для этих игроков, по остальным берётся лишь id (в player_ids)
+        """
+        soup = cls.make_soup(page, parse_only=TOURNAMENT_STRAINER)
 
         tournament_info = soup.find('h1')
         # Эта строчка работает только с мобильной страницей. На десктопе
@@ -28,16 +83,22 @@ class TournamentParser(Parser[Tournament]):
         tournament_id = int(tournament_link['href'].split('%2F')[-1])  # Получение
         # идентификатора из ссылки
 
-        registered_players = cls._parse_registered_players(soup)
-        refused_players = cls._parse_withdrawn_players(soup)
-
-        is_completed = False
+        # Завершённый турнир: игроки и результаты в одной таблице, идущий или
+        # будущий - в первой таблице на странице
+        results_table = soup.find('table', class_='tablesort tour-players')
         is_online = cls._is_online(soup)
-        if not is_online:
-            is_completed = cls._is_completed(soup)
-        player_results = []
-        if is_completed:
-            player_results = cls._parse_player_results(soup)
+        is_completed = not is_online and results_table is not None
+        registered_players, player_results, registered_ids = cls._parse_players_table(
+            results_table or soup.find('table', class_='tablesort'),
+            with_results=is_completed,
+            players_of_interest=players_of_interest,
+        )
+        refused_players, _, refused_ids = cls._parse_players_table(
+            # Таблица снявшихся участников (изначально скрыта, имеет класс 'hide')
+            soup.find('table', class_='tablesort hide'),
+            with_results=False,
+            players_of_interest=players_of_interest,
+        )
 
         return Tournament(
             id=tournament_id,
@@ -47,15 +108,10 @@ class TournamentParser(Parser[Tournament]):
             registered_players=registered_players,
             refused_players=refused_players,
             player_results=player_results,
+            player_ids=registered_ids + refused_ids,
+            refused_ids=refused_ids,
         )
 
-    @classmethod
-    def _is_completed(cls, soup: BeautifulSoup) -> bool:
-        table_completted = soup.find('table', class_='tablesort tour-players')
-        if table_completted:
-            return True
-        return False
-
     @classmethod
     def _is_online(cls, soup: BeautifulSoup) -> bool:
         li_tour_online = soup.find('li', attrs={'data-tab': 'tour-online'})
@@ -64,92 +120,55 @@ class TournamentParser(Parser[Tournament]):
         return False
 
     @classmethod
-    def _parse_registered_players(cls, soup: BeautifulSoup) -> list[Player]:
-        players = []
-        table_completted = soup.find('table', class_='tablesort tour-players')
-        table = (
-            table_completted
-            if table_completted
-            else soup.find('table', class_='tablesort')
-        )
+    def _parse_players_table(
+        cls,
+        table: Tag | None,
+        with_results: bool,
+        players_of_interest: set[int] | None = None,
+    ) -> tuple[list[Player], list[PlayerResult], list[int]]:
+        """Один проход по строкам таблицы: игроки, если нужно, их результаты
+        и id всех игроков таблицы"""
+        players: list[Player] = []
+        player_results: list[PlayerResult] = []
+        player_ids: list[int] = []
         if table is None:
-            return []
-        tbody = table.find('tbody')
-        if tbody is None:
-            return []
-        rows = tbody.find_all('tr')  # Все строки участников
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) > 0:  # Проверка наличия данных
-                player_link = cells[1].find('a')['href'] if cells[1].find('a') else None
-                player = Player(
-                    id=int(player_link.split('/')[-1].split('?')[0]),
-                    name=cells[1].text.strip(),
-                )
-                players.append(player)
-        return players
-
-    # Эта функция во многом дублирует parse_registered_players
-    # Отличия в структуре данных, включающей результаты
-    # В будущем нужно перейти на нее
-    @classmethod
-    def _parse_player_results(cls, soup: BeautifulSoup) -> list[PlayerResult]:
-        player_results = []
-        table = soup.find('table', class_='tablesort tour-players')
-        if not table:
-            return player_results
-
+            return players, player_results, player_ids
         tbody = table.find('tbody')
         if tbody is None:
-            return []
-        rows = tbody.find_all('tr')  # Все строки участников
-        for row in rows:
+            return players, player_results, player_ids
+        for row in tbody.find_all('tr'):  # Все строки участников
             cells = row.find_all('td')
-            if len(cells) > 0:  # Проверка наличия данных
-                player_link = cells[1].find('a')['href'] if cells[1].find('a') else None
-                if not player_link:
-                    continue
-                name = cells[1].text.strip()
-                player_id = int(player_link.split('/')[-1].split('?')[0])
-                rating_before = float(cells[2].text.strip())
-                rating_delta = float(cells[3].text.strip().replace('−', '-'))
-                rating_after = float(cells[4].text.strip())
-                games_str = cells[5].text.strip()
-                _, games_won, games_lost = list(map(int, re.findall(r'\d+', games_str)))
-                player_result = PlayerResult(
-                    player_id=player_id,
-                    name=name,
-                    rating_before=rating_before,
-                    rating_delta=rating_delta,
-                    rating_after=rating_after,
-                    games_won=games_won,
-                    games_lost=games_lost,
-                )
-                player_results.append(player_result)
-        return player_results
+            if len(cells) == 0:  # Проверка наличия данных
+                continue
+            player_link = cells[1].find('a')['href'] if cells[1].find('a') else None
+            player_id = int(player_link.split('/')[-1].split('?')[0])
+            player_ids.append(player_id)
+            if players_of_interest is not None and player_id not in players_of_interest:
+                continue
+            name = cells[1].text.strip()
+            players.append(Player(id=player_id, name=name))
+            if with_results:
+                player_results.append(cls._parse_player_result(cells, player_id, name))
+        return players, player_results, player_ids
 
     @classmethod
-    def _parse_withdrawn_players(cls, soup: BeautifulSoup) -> list[Player]:
-        withdrawn_players = []
-        # Таблица снявшихся участников (изначально скрыта, имеет класс 'hide')
-        table = soup.find('table', class_='tablesort hide')
-        if table is None:
-            return []
-        tbody = table.find('tbody')
-        if tbody is None:
-            return []
-        rows = table.find('tbody').find_all('tr')
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) > 0:  # Проверка наличия данных
-                player_link = cells[1].find('a')['href'] if cells[1].find('a') else None
-                player = Player(
-                    id=int(player_link.split('/')[-1]),
-                    name=cells[1].text.strip(),
-                )
-                withdrawn_players.append(player)
-
-        return withdrawn_players
+    def _parse_player_result(
+        cls, cells: list[Tag], player_id: int, name: str
+    ) -> PlayerResult:
+        rating_before = float(cells[2].text.strip())
+        rating_delta = float(cells[3].text.strip().replace('−', '-'))
+        rating_after = float(cells[4].text.strip())
+        games_str = cells[5].text.strip()
+        _, games_won, games_lost = list(map(int, re.findall(r'\d+', games_str)))
+        return PlayerResult(
+            player_id=player_id,
+            name=name,
+            rating_before=rating_before,
+            rating_delta=rating_delta,
+            rating_after=rating_after,
+            games_won=games_won,
+            games_lost=games_lost,
+        )
 
 
 def main():
@@ -1,13 +1,11 @@
 import re
+from dataclasses import dataclass, field
 from enum import Enum
 
-from bs4 import BeautifulSoup
-
 import datetime
-from pydantic import BaseModel, Field
 
-from clients.client import RTTFClient
 from parsers.parser import Parser
+from utils import models
 from utils.custom_logger import logger
 from utils.models import DateRange
 
@@ -18,27 +16,37 @@ class TournamentStatus(Enum):
     PLANNED = 'planned'  # Запланирован
 
 
-class TournamentParseResult(BaseModel):
-    id: int = Field(description='Tournament ID')
-    datetime: str = Field(description='Tournament datetime')
-    name: str = Field(str, description='Name of the tournament')
+@dataclass(slots=True)
+class TournamentParseResult:
+    """Строка списка турниров. Создаётся на каждую строку, поэтому без pydantic"""
+
+    id: int  # Tournament ID
+    datetime: str  # Tournament datetime
+    name: str  # Name of the tournament
     # status: TournamentStatus = Field(description="Status of the tournament")
-    players: str = Field(int, description='Players participating in the tournament')
-    rating: str | None = Field(int, description='Mean rating of the tournament')
-    type: str = Field(int | None, description='Max rating')
+    players: str  # Players participating in the tournament
+    rating: str | None  # Mean rating of the tournament
+    type: str  # Max rating
+
+    def __post_init__(self):
+        if models.VALIDATE and not isinstance(self.id, int):
+            raise TypeError(
+                f'Invalid type for id: expected int, got {type(self.id).__name__}'
+            )
 
     def __str__(self):
         return f"Tournament id:{self.id} name:{self.name} rating:{self.rating} dtm:{self.datetime}"
 
 
-class TournamentsParseResult(BaseModel):
-    tournaments: list[TournamentParseResult] = Field(list[TournamentParseResult])
-    expected_total_count: int | None = Field(int | None)
+@dataclass(slots=True)
+class TournamentsParseResult:
+    tournaments: list[TournamentParseResult] = field(default_factory=list)
+    expected_total_count: int | None = None
 
 
 def transform_dict_for_tr(data: dict) -> dict:
     # TODO: Переделать
-    data['id'] = data['link'].split('/')[1]
+    data['id'] = int(data['link'].split('/')[1])
 
     date_str = data['date'].split(' / ')[0]  # Get only the date part
     time_str = data['time']
@@ -50,8 +58,8 @@ def transform_dict_for_tr(data: dict) -> dict:
 
 class TournamentsParser(Parser):
     @classmethod
-    def _parse_data(cls, page: str) -> list[TournamentParseResult]:
-        soup = BeautifulSoup(page, 'html.parser')
+    def _parse_data(cls, page: str | bytes) -> list[TournamentParseResult]:
+        soup = cls.make_soup(page)
         tbody = soup.find('table')
         if not tbody:
             raise ValueError('Unable to find tournaments section.')
@@ -67,7 +75,16 @@ class TournamentsParser(Parser):
 
             if cls._is_tournament_row(row):
                 tournament = cls._parse_tournament(row, current_date)
-                tournaments.append(TournamentParseResult(**tournament))
+                tournaments.append(
+                    TournamentParseResult(
+                        id=tournament['id'],
+                        datetime=tournament['datetime'],
+                        name=tournament['name'],
+                        players=tournament['players'],
+                        rating=tournament['rating'],
+                        type=tournament['type'],
+                    )
+                )
         if current_date is None:
             logger.warning('День не распаршен!')
             return tournaments
@@ -135,6 +152,8 @@ class TournamentsParser(Parser):
 
 
 def main():
+    from clients.client import RTTFClient
+
     pages = RTTFClient().get_tournaments_pages(
         date_range=DateRange(
             datetime.date.today(), datetime.date.today() + datetime.timedelta(days=1)
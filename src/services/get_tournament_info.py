@@ -2,14 +2,12 @@ import re
 import time
 
 from collections import defaultdict
-from multiprocessing.pool import ThreadPool
 
 from clients.client import RTTFClient
 from parsers.tournament_parser import TournamentParser
 from parsers.tournaments_parser import TournamentsParser
 from utils.custom_logger import logger
 from utils.models import DateRange, Tournament
-from utils.settings import settings
 
 
 def get_player_id(profile_link: str) -> int:
@@ -36,32 +34,37 @@ class TournamentService:
             f'date_from={date_range.date_from}, date_to={date_range.date_to}'
         )
         matching: dict[int, list[Tournament]] = defaultdict(list)
-        tournaments_pages = RTTFClient.get_tournaments_pages(date_range=date_range)
-        with ThreadPool(settings.MAX_WORKERS) as pool:
-            tournaments_parse_result = pool.map(
-                TournamentsParser.parse_data, tournaments_pages
-            )
-
-        tournaments_parse_result = [
-            result for sublist in tournaments_parse_result for result in sublist
-        ]
+        # Соседние страницы списка пересекаются по одному дню, убираем дубли
+        tournaments_by_id = {
+            result.id: result
+            for page in RTTFClient.iter_tournaments_pages(date_range=date_range)
+            for result in TournamentsParser.parse_data_shared(page) or []
+        }
+        tournaments_parse_result = list(tournaments_by_id.values())
 
         if not tournaments_parse_result:
             logger.warning('Tournaments were not found')
             return {}
 
-        for tournament in tournaments_parse_result:
-            sub_matching = self.process_tournament(tournament, friend_ids)
+        # Страницы всех турниров скачиваются конкурентно одним event loop
+        # и разбираются в пуле процессов
+        tournament_pages = RTTFClient.get_tournaments(
+            [tournament.id for tournament in tournaments_parse_result]
+        )
+        # Нужны только друзья, остальных игроков парсер пропускает.
+        # Одновременные запросы с теми же друзьями разбирают страницу один раз
+        for tournament in TournamentParser.parse_many_shared(
+            tournament_pages, players_of_interest=set(friend_ids)
+        ):
+            sub_matching = self.match_friends(tournament, friend_ids)
             for friend_id, tournament_with_friend in sub_matching:
                 matching[friend_id].append(tournament_with_friend)
         return matching
 
     @classmethod
-    def process_tournament(
-        cls, tournament_parse_result, friend_ids: set[int]
+    def match_friends(
+        cls, tournament: Tournament | None, friend_ids: set[int]
     ) -> list[tuple[int, Tournament]]:
-        tournament_page = RTTFClient.get_tournament(tournament_parse_result.id)
-        tournament = TournamentParser.parse_data(tournament_page)
         if tournament is None:
             logger.warning('Tournament was not found')
             return []
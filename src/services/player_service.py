@@ -1,17 +1,50 @@
 import datetime
 import json
-from collections import defaultdict
+import time
+from dataclasses import dataclass
+from functools import partial
 from typing import Optional
 
-from bot.bot_context import bot_context
+import sqlalchemy as sa
+
 from bot.notifications import send_player_update
 from clients.client import RTTFClient
-from db.models import DBPlayerTournament, DBSubscription, DBTournament
+from db.models import (
+    DBPlayerTournament,
+    DBRefreshEvent,
+    DBTournament,
+    DBTournamentPlayer,
+)
 from db.session_factory import open_session
 from parsers.tournament_parser import TournamentParser
 from parsers.tournaments_parser import TournamentParseResult, TournamentsParser
+from services.refresh_policy import (
+    RefreshPolicy,
+    RefreshSignals,
+    get_refresh_limit,
+    get_refresh_policy,
+    update_change_rate,
+)
+from services.subscription_index import SubscriptionIndex
 from utils.custom_logger import logger
 from utils.models import DateRange, PlayerTournamentInfo, Tournament
+from utils.pipeline import Pipeline, Stage, StageStats
+from utils.settings import settings
+
+
+@dataclass(slots=True)
+class ParsedPage:
+    """Результат стадии разбора в process_batch_and_notify"""
+
+    tournament_id: int
+    # '' - страницы нет (404)
+    page: str
+    fingerprint: str | None = None
+    tournament: Tournament | None = None
+    # Отпечаток совпал с сохранённым, страница не разбиралась
+    unchanged: bool = False
+    # Страница есть, но парсер её не разобрал
+    failed: bool = False
 
 
 class PlayerService:
@@ -24,9 +57,16 @@ class PlayerService:
     - Обновление данных по игрокам по конкретному турниру
     """
 
+    # None - политика из settings.REFRESH_POLICY
+    refresh_policy: RefreshPolicy | None = None
+    # Индекс подписок общий на процесс: воркер загружает его один раз и
+    # дальше только догоняет по журналу изменений
+    subscription_index = SubscriptionIndex()
+
     # Уносим парсинг и нотификации в отдельные методы, чтобы переопределять в тестах
     def _get_tournaments_pages(self):
-        pages = RTTFClient().get_tournaments_pages(
+        # Страницы парсятся по мере скачивания
+        pages = RTTFClient().iter_tournaments_pages(
             date_range=DateRange(
                 datetime.date.today() - datetime.timedelta(days=2),
                 datetime.date.today() + datetime.timedelta(days=3),
@@ -39,94 +79,109 @@ class PlayerService:
         return page
 
     def _send_player_update(self, user_id, info):
+        # TeleBot создаётся при импорте bot.bot_context, он нужен только
+        # при отправке, а не при поиске турниров
+        from bot.bot_context import bot_context
+
         send_player_update(user_id, info, bot_context=bot_context)
 
     def update_tournaments(self):
-        pages = self._get_tournaments_pages()
-        tournaments_data: list[TournamentParseResult] = []
-        for page in pages:
-            tournaments_data.extend(TournamentsParser.parse_data(page))
+        # Страницы списка скачиваются последовательно (следующее окно зависит
+        # от предыдущей страницы), а разбираются пачкой в пуле процессов
+        pages = list(self._get_tournaments_pages())
+        # Соседние страницы списка пересекаются по одному дню, убираем дубли
+        tournaments_by_id: dict[int, TournamentParseResult] = {}
+        for parsed in TournamentsParser.parse_many(pages):
+            for tournament_parse in parsed:
+                tournaments_by_id[tournament_parse.id] = tournament_parse
 
-        added_list: list[TournamentParseResult] = []
-        with open_session() as session:
-            for tournament_parse in tournaments_data:
-                existing = (
-                    session.query(DBTournament)
-                    .filter_by(id=tournament_parse.id)
-                    .first()
-                )
-                if not existing:
-                    # inserting new tournament record
-                    tournament_info = {
+        # datetime.now приводит к скорейшей обработке турнира другим кроном
+        now_ts = int(datetime.datetime.now().timestamp())
+        rows = [
+            {
+                'id': tournament_parse.id,
+                'tournament_date': datetime.datetime.strptime(
+                    tournament_parse.datetime, '%Y-%m-%d %H:%M'
+                ).date(),
+                'info_json': json.dumps(
+                    {
                         'name': tournament_parse.name,
                         'rating': tournament_parse.rating,
+                        'datetime': tournament_parse.datetime,
                     }
-                    dt = datetime.datetime.strptime(
-                        tournament_parse.datetime, '%Y-%m-%d %H:%M'
-                    )
-                    tournament_date = dt.date()
-                    tournament_record = DBTournament(
-                        id=tournament_parse.id,
-                        tournament_date=tournament_date,
-                        info_json=json.dumps(tournament_info),
-                        # datetime.now приводит к скорейшей обработке турнира
-                        # другим кроном
-                        next_update_dtm=datetime.datetime.now().timestamp(),
-                    )
-                    session.add(tournament_record)
-                    added_list.append(tournament_parse)
+                ),
+                'next_update_dtm': now_ts,
+            }
+            for tournament_parse in tournaments_by_id.values()
+        ]
+        with open_session() as session:
+            inserted_ids = DBTournament.insert_missing(session, rows)
             session.commit()
+
+        added_list: list[TournamentParseResult] = [
+            tournament_parse
+            for tournament_parse in tournaments_by_id.values()
+            if tournament_parse.id in inserted_ids
+        ]
         for added in added_list:
             logger.info(f'Added tournament {str(added)}')
         return added_list
 
-    def _get_subscriptions_dict(self) -> dict[int, list[int]]:
-        """Возвращает словарь игроков и кто на них подписан
-        Формат: player_id -> list[user_id]
-        """
-        player_users = defaultdict(list)
+    def _get_subscriptions_index(self) -> SubscriptionIndex:
         with open_session() as session:
-            subscriptions = session.query(DBSubscription).all()
-            for sub in subscriptions:
-                player_users[sub.player_id].append(sub.user_id)
-        return dict(player_users)
+            self.subscription_index.refresh(session)
+        return self.subscription_index
 
-    def _update_player_tournaments(self, players, tournament_id):
+    def _is_unchanged(self, tournament_id, fingerprint) -> bool:
+        """Значимая часть страницы не изменилась с прошлой обработки"""
+        if fingerprint is None:
+            return False
+        with open_session() as session:
+            tournament = session.query(DBTournament).filter_by(id=tournament_id).first()
+            return tournament is not None and tournament.fingerprint == fingerprint
+
+    def _update_player_tournaments(
+        self, players, tournament_id, page=None, tournament_obj=None, fingerprint=None
+    ):
         """Обновляет таблицу участий игроков в турнирах
         Не пишет обновления по идущим турнирам
 
+        page, tournament_obj и fingerprint передаются, если страница уже скачана
+        и разобрана (см. process_batch_and_notify)
+
         Returns:
         updated (dict): словарь с апдейтами, которые пойдут в нотификации
         is_ok (bool): False, если турнир не спарсился
         """
-        page = self._get_tournament_page(tournament_id)
+        if page is None:
+            page = self._get_tournament_page(tournament_id)
 
         # Если page пустая, значит была ошибка 404 и турнир удалили
         if page == '':
             return {}, False
 
-        tournament_obj = TournamentParser.parse_data(page)
+        # Если значимая часть страницы не изменилась с прошлой обработки,
+        # не парсим её и не пересчитываем участия игроков
+        if fingerprint is None:
+            fingerprint = TournamentParser.get_fingerprint(page)
+        if tournament_obj is None:
+            if self._is_unchanged(tournament_id, fingerprint):
+                logger.debug('Tournament %s is not changed', tournament_id)
+                return {}, True
+            tournament_obj = TournamentParser.parse_data(
+                page, players_of_interest=set(players)
+            )
         if tournament_obj is None:
             raise RuntimeError('Parsing is failed')
         
         # Если турнир онлайн - не обновляем
         if tournament_obj.is_online:
-            return {}, True
-
-        # Обновляем поле players в таблице tournaments
-        all_players = [player.id for player in tournament_obj.registered_players]
-        all_players += [player.id for player in tournament_obj.refused_players]
-        all_players = list(set(all_players))
-        sorted(all_players)
-
-        with open_session() as session:
-            tournament = session.query(DBTournament).filter_by(id=tournament_id).first()
-            if tournament is None:
-                raise RuntimeError(
-                    f'tournament_id {tournament_id} должен быть в таблице tournaments'
+            with open_session() as session:
+                session.query(DBTournament).filter_by(id=tournament_id).update(
+                    {DBTournament.fingerprint: fingerprint}
                 )
-            tournament.set_players(all_players)
-            session.commit()
+                session.commit()
+            return {}, True
 
         players_dict: dict[int, PlayerTournamentInfo] = {}
 
@@ -169,79 +224,262 @@ class PlayerService:
                 games_lost=result.games_lost,
             )
 
-        # Смотрим на то, что лежит в базе
+        # Смотрим на то, что лежит в базе: все участия турнира одним запросом,
+        # сравнение в памяти, вставки и обновления пачками в одной транзакции.
         # Если появилось новое или обновилось старое - посылаем нотификацию
         updated = {}
+        inserts, updates = [], []
         with open_session() as session:
-            for player_id, info in players_dict.items():
-                existing = (
-                    session.query(DBPlayerTournament)
-                    .filter_by(tournament_id=tournament_id, player_id=player_id)
-                    .first()
+            # Отпечаток сохраняется вместе с участиями, чтобы при падении
+            # посередине турнир обработался заново
+            found = (
+                session.query(DBTournament)
+                .filter_by(id=tournament_id)
+                .update({DBTournament.fingerprint: fingerprint})
+            )
+            if not found:
+                raise RuntimeError(
+                    f'tournament_id {tournament_id} должен быть в таблице tournaments'
+                )
+            # Все участники турнира, по ним ищутся турниры игрока
+            DBTournamentPlayer.replace(
+                session, tournament_id, tournament_obj.get_player_statuses()
+            )
+            existing = dict(
+                session.query(
+                    DBPlayerTournament.player_id, DBPlayerTournament.info_json
                 )
+                .filter_by(tournament_id=tournament_id)
+                .all()
+            )
+            for player_id, info in players_dict.items():
                 serialized = info.serialize()
-                if existing is None:
-                    new_record = DBPlayerTournament(
-                        player_id=player_id,
-                        tournament_id=tournament_id,
-                        info_json=serialized,
-                    )
-                    session.add(new_record)
-                    updated[player_id] = info
-                elif existing.info_json != serialized:
-                    existing.info_json = serialized
-                    updated[player_id] = info
+                old_serialized = existing.get(player_id)
+                if old_serialized == serialized:
+                    continue
+                row = {
+                    'player_id': player_id,
+                    'tournament_id': tournament_id,
+                    'info_json': serialized,
+                }
+                (inserts if old_serialized is None else updates).append(row)
+                updated[player_id] = info
+            if inserts:
+                session.execute(sa.insert(DBPlayerTournament), inserts)
+            if updates:
+                session.execute(sa.update(DBPlayerTournament), updates)
             session.commit()
 
         return updated, True
 
+    def get_refresh_policy(self) -> RefreshPolicy:
+        return self.refresh_policy or get_refresh_policy(settings.REFRESH_POLICY)
+
+    def _lease_batch(self, session, batch_size: int, now) -> list[int]:
+        """Берёт в обработку просроченные турниры в пределах часового бюджета.
+        Бюджет считается по обработкам (DBRefreshEvent), а не по турнирам:
+        подсчёт, аренда и запись обработок идут одной транзакцией под
+        общей для воркеров блокировкой"""
+        DBRefreshEvent.lock(session)
+        used = DBRefreshEvent.count_used(session, now)
+        limit = get_refresh_limit(
+            batch_size, settings.REFRESH_BUDGET_PER_HOUR, used
+        )
+        if limit == 0:
+            logger.info('Refresh budget is exhausted')
+            session.commit()
+            return []
+        leased_ids = DBTournament.lease_expired(
+            session, now, limit, settings.REFRESH_LEASE_SECONDS
+        )
+        DBRefreshEvent.record(session, leased_ids, now)
+        session.commit()
+        return leased_ids
+
+    def _schedule(
+        self, policy, tournament, tournament_obj, players, stored_player_ids, now
+    ) -> None:
+        """Время следующей обработки и приоритет турнира по политике.
+        stored_player_ids - участники из базы, нужны, если страница не менялась"""
+        changed = tournament_obj is not None
+        tournament.change_rate = update_change_rate(tournament.change_rate, changed)
+        player_ids = tournament_obj.player_ids if changed else stored_player_ids
+        refresh = policy.schedule(
+            RefreshSignals(
+                now=now,
+                start=tournament.get_start(),
+                watchers=len(players.intersection(player_ids)),
+                change_rate=tournament.change_rate,
+                is_completed=tournament_obj.is_completed if changed else None,
+            )
+        )
+        tournament.next_update_dtm = refresh.next_update_dtm
+        tournament.priority = refresh.priority
+
+    def _fetch_stage(self, item):
+        tournament_id, stored_fingerprint = item
+        return tournament_id, stored_fingerprint, self._get_tournament_page(
+            tournament_id
+        )
+
+    def _parse_stage(self, players, item) -> ParsedPage:
+        """Разбирает изменившиеся страницы. Пустая (404) и не изменившаяся
+        страницы идут дальше без разбора"""
+        tournament_id, stored_fingerprint, page = item
+        result = ParsedPage(tournament_id, page)
+        if page == '':
+            return result
+        result.fingerprint = TournamentParser.get_fingerprint(page)
+        if result.fingerprint is not None and result.fingerprint == stored_fingerprint:
+            result.unchanged = True
+            return result
+        result.tournament = TournamentParser.parse_pooled(
+            page, players_of_interest=players
+        )
+        result.failed = result.tournament is None
+        return result
+
+    def _notify_stage(self, item):
+        # Ошибка одного получателя (например, он заблокировал бота) не
+        # останавливает стадию: остальные нотификации батча уходят
+        user_id, info = item
+        try:
+            self._send_player_update(user_id, info)
+        except Exception:
+            logger.exception('Failed to notify user %s', user_id)
+
     def process_batch_and_notify(
         self, batch_size: int, now: Optional[datetime.datetime] = None
     ):
+        """Обрабатывает батч турниров, у которых наступил next_update_dtm
+
+        Конвейер: скачивание (MAX_WORKERS потоков) -> разбор (пул процессов)
+        -> запись в базу -> отправка нотификаций. Стадии связаны ограниченными
+        очередями, поэтому батч идёт со скоростью самой медленной стадии.
+        В базу пишет только текущий поток: ORM-объекты батча не покидают
+        свою сессию. Порядок обработки турниров внутри батча не сохраняется.
+        Время следующей обработки считает политика (settings.REFRESH_POLICY),
+        число обработок в час ограничено settings.REFRESH_BUDGET_PER_HOUR.
+        Турниры батча берутся в аренду (DBTournament.lease_expired), поэтому
+        несколько воркеров могут разбирать очередь параллельно
+        """
         all_updates = []
         if now is None:
             now = datetime.datetime.now()
+        policy = self.get_refresh_policy()
         with open_session() as session:
+            leased_ids = self._lease_batch(session, batch_size, now)
+            if not leased_ids:
+                return all_updates
             expired_tournaments: list[DBTournament] = (
                 session.query(DBTournament)
-                .filter(DBTournament.next_update_dtm < now.timestamp())
-                .order_by(DBTournament.next_update_dtm)
-                .limit(batch_size)
+                .filter(DBTournament.id.in_(leased_ids))
                 .all()
             )
-            if not expired_tournaments:
-                return all_updates
+            # Участники нужны _schedule для неизменившихся страниц. Читаются
+            # одним запросом на батч, а не через tournament_players: коммит
+            # после каждого турнира сбрасывает загруженные связи
+            stored_players = DBTournamentPlayer.get_player_ids(session, leased_ids)
 
-            subscriptions = self._get_subscriptions_dict()
-            unique_players = set(subscriptions.keys())
+            subscriptions = self._get_subscriptions_index()
+            unique_players = subscriptions.get_players()
+            tournaments_by_id = {
+                tournament.id: tournament for tournament in expired_tournaments
+            }
 
-            for tournament in expired_tournaments:
-                updates, is_ok= self._update_player_tournaments(
-                    unique_players, tournament.id
-                )
+            fetch_parse = Pipeline(
+                [
+                    Stage('fetch', self._fetch_stage, workers=settings.MAX_WORKERS),
+                    Stage(
+                        'parse',
+                        partial(self._parse_stage, unique_players),
+                        workers=settings.PARSE_WORKERS,
+                    ),
+                ],
+                queue_size=settings.PIPELINE_QUEUE_SIZE,
+            )
+            notify = Pipeline(
+                [Stage('notify', self._notify_stage)],
+                queue_size=settings.PIPELINE_QUEUE_SIZE,
+            )
+            write_stats = StageStats()
+            notify.start()
+            try:
+                with fetch_parse:
+                    fetch_parse.feed(
+                        [
+                            (tournament.id, tournament.fingerprint)
+                            for tournament in expired_tournaments
+                        ]
+                    )
+                    for parsed in fetch_parse.results():
+                        start = time.perf_counter()
+                        tournament = tournaments_by_id[parsed.tournament_id]
+                        if parsed.failed:
+                            # Турнир снова станет просроченным, когда
+                            # истечёт аренда
+                            logger.error(
+                                'Tournament %s is not parsed, skipping',
+                                parsed.tournament_id,
+                            )
+                            write_stats.items += 1
+                            write_stats.busy += time.perf_counter() - start
+                            continue
+                        if parsed.page == '' or parsed.unchanged:
+                            updates, is_ok = {}, parsed.page != ''
+                        else:
+                            updates, is_ok = self._update_player_tournaments(
+                                unique_players,
+                                parsed.tournament_id,
+                                page=parsed.page,
+                                tournament_obj=parsed.tournament,
+                                fingerprint=parsed.fingerprint,
+                            )
 
-                # Если турнир пропал с сайта перестаем его обовлять
-                if not is_ok:
-                    tournament.next_update_dtm = None
-                    session.commit()
-                    continue
+                        tournament.last_update_dtm = int(now.timestamp())
 
-                # Главное - не поломаться в этот момент
-                # Если update отработает, а нотификации не отправятся, то мы их потеряем
-                # Можно сделать надежнее, но пока так
-                for player_id, info in updates.items():
-                    if player_id in subscriptions:
-                        for user_id in subscriptions[player_id]:
-                            self._send_player_update(user_id, info)
-
-                # Установка времени следующего апдейта турнира
-                if tournament.tournament_date < (
-                    now.date() - datetime.timedelta(days=2)
-                ):
-                    tournament.next_update_dtm = None
-                else:
-                    tournament.next_update_dtm = now.timestamp() + 3600 * 2
-                # Если батч упадет посередине, то отработавшая часть не перезапустится
-                session.commit()
-                all_updates.extend(updates)
+                        # Если турнир пропал с сайта перестаем его обовлять
+                        if not is_ok:
+                            tournament.next_update_dtm = None
+                            session.commit()
+                        else:
+                            # Главное - не поломаться в этот момент
+                            # Если update отработает, а нотификации не
+                            # отправятся, то мы их потеряем
+                            for player_id, info in updates.items():
+                                for user_id in subscriptions.get_users(player_id):
+                                    notify.put((user_id, info))
+
+                            # Установка времени следующего апдейта турнира
+                            self._schedule(
+                                policy,
+                                tournament,
+                                parsed.tournament,
+                                unique_players,
+                                stored_players[parsed.tournament_id],
+                                now,
+                            )
+                            # Если батч упадет посередине, то отработавшая
+                            # часть не перезапустится
+                            session.commit()
+                            all_updates.extend(updates)
+                        write_stats.items += 1
+                        write_stats.busy += time.perf_counter() - start
+            except BaseException:
+                # Нотификации по уже записанным апдейтам досылаются,
+                # даже если батч упал. Пробрасывается ошибка батча
+                notify.close()
+                notify.join(raise_error=False)
+                raise
+            notify.close()
+            notify.join()
+        stats = {
+            **fetch_parse.get_stats(),
+            'write': write_stats,
+            **notify.get_stats(),
+        }
+        logger.info(
+            'Batch pipeline: %s',
+            ', '.join(f'{name} {stage_stats}' for name, stage_stats in stats.items()),
+        )
         return all_updates
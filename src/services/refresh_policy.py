@@ -0,0 +1,140 @@
+import datetime
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+# Через сколько дней после турнира он больше не обновляется
+STOP_AFTER_DAYS = 2
+# Вес последней обработки в сглаженной доле изменений страницы
+CHANGE_RATE_ALPHA = 0.3
+# Доля изменений у турнира, который ещё ни разу не обрабатывался
+INITIAL_CHANGE_RATE = 0.5
+
+
+@dataclass(slots=True)
+class RefreshSignals:
+    """Что известно о турнире после очередной обработки"""
+
+    now: datetime.datetime
+    # Начало турнира. Для старых записей без времени - полночь дня турнира
+    start: datetime.datetime
+    # Сколько игроков с подписчиками записались или снялись
+    watchers: int
+    # Сглаженная доля обработок, на которых страница менялась, 0..1
+    change_rate: float
+    # None - страница не изменилась и не разбиралась
+    is_completed: bool | None = None
+
+
+@dataclass(slots=True)
+class Refresh:
+    # None - турнир больше не обновляется
+    next_update_dtm: float | None
+    priority: float = 0.0
+
+
+def update_change_rate(change_rate: float | None, changed: bool) -> float:
+    if change_rate is None:
+        change_rate = INITIAL_CHANGE_RATE
+    return change_rate * (1 - CHANGE_RATE_ALPHA) + CHANGE_RATE_ALPHA * changed
+
+
+def get_refresh_limit(batch_size: int, budget_per_hour: int, used: int) -> int:
+    """Сколько турниров можно взять в обработку, не выходя из часового бюджета.
+    used - число обработок за последний час, budget_per_hour <= 0 - без
+    ограничения. Общая для PlayerService и benchmarks.refresh_simulator"""
+    if budget_per_hour <= 0:
+        return batch_size
+    return max(0, min(batch_size, budget_per_hour - used))
+
+
+class RefreshPolicy(ABC):
+    """Считает время следующей обработки турнира и его приоритет.
+    Экземпляр выдаёт get_refresh_policy"""
+
+    name: str
+
+    def is_expired(self, signals: RefreshSignals) -> bool:
+        return signals.start.date() < (
+            signals.now.date() - datetime.timedelta(days=STOP_AFTER_DAYS)
+        )
+
+    @abstractmethod
+    def schedule(self, signals: RefreshSignals) -> Refresh:
+        pass
+
+
+class FixedRefreshPolicy(RefreshPolicy):
+    """Каждые 2 часа, пока не пройдёт два дня с турнира"""
+
+    name = 'fixed'
+    INTERVAL = datetime.timedelta(hours=2)
+
+    def schedule(self, signals: RefreshSignals) -> Refresh:
+        if self.is_expired(signals):
+            return Refresh(None)
+        return Refresh((signals.now + self.INTERVAL).timestamp())
+
+
+class AdaptiveRefreshPolicy(RefreshPolicy):
+    """Интервал зависит от того, сколько до начала турнира, появились ли
+    результаты, следит ли кто-то за участниками и как часто меняется страница.
+
+    Турнир без подписанных участников всё равно обновляется, только реже:
+    запись подписанного игрока нужно заметить. Турнир с результатами и без
+    подписанных участников больше не обновляется. Новый подписчик сбрасывает
+    время обновления сам, см. DBTournament.set_tournaments_update_dtm_by_player
+    """
+
+    name = 'adaptive'
+    MIN_INTERVAL = datetime.timedelta(minutes=15)
+    MAX_INTERVAL = datetime.timedelta(hours=24)
+    # Во сколько раз реже обновляется турнир без подписанных участников
+    UNWATCHED_FACTOR = 4
+
+    def get_base_interval(self, signals: RefreshSignals) -> datetime.timedelta:
+        if signals.is_completed:
+            # Рейтинг ещё могут пересчитать
+            return datetime.timedelta(hours=6)
+        to_start = signals.start - signals.now
+        if to_start > datetime.timedelta(days=3):
+            return datetime.timedelta(hours=4)
+        if to_start > datetime.timedelta(days=1):
+            return datetime.timedelta(hours=2)
+        if to_start > datetime.timedelta(0):
+            return datetime.timedelta(hours=1)
+        # Турнир идёт, ждём результатов
+        return datetime.timedelta(minutes=30)
+
+    def schedule(self, signals: RefreshSignals) -> Refresh:
+        if self.is_expired(signals):
+            return Refresh(None)
+        if signals.is_completed and not signals.watchers:
+            return Refresh(None)
+
+        interval = self.get_base_interval(signals)
+        if not signals.watchers:
+            interval *= self.UNWATCHED_FACTOR
+        # Часто меняющаяся страница обновляется до двух раз чаще
+        interval /= 1 + signals.change_rate
+        interval = min(max(interval, self.MIN_INTERVAL), self.MAX_INTERVAL)
+
+        is_running = signals.start <= signals.now and not signals.is_completed
+        priority = (
+            (1 + min(signals.watchers, 10))
+            * (1 + signals.change_rate)
+            * (2 if is_running else 1)
+        )
+        return Refresh((signals.now + interval).timestamp(), priority)
+
+
+REFRESH_POLICIES: dict[str, type[RefreshPolicy]] = {
+    policy.name: policy for policy in (FixedRefreshPolicy, AdaptiveRefreshPolicy)
+}
+
+
+def get_refresh_policy(name: str) -> RefreshPolicy:
+    try:
+        policy = REFRESH_POLICIES[name]
+    except KeyError:
+        raise ValueError(f'Unknown refresh policy {name}') from None
+    return policy()
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import defaultdict
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from db.models import DBSubscription, DBSubscriptionChange
+from utils.custom_logger import logger
+from utils.settings import settings
+
+
+class SubscriptionIndex:
+    """Инвертированный индекс подписок player_id -> user_ids.
+
+    Загружается из subscriptions один раз, дальше догоняется по журналу
+    subscription_changes. id в Postgres выдаются при вставке, а не при
+    коммите: запись с меньшим id может стать видна позже записи с большим.
+    Поэтому каждый раз перечитывается окно из последних
+    settings.SUBSCRIPTION_INDEX_OVERLAP id, и всё окно применяется заново по
+    порядку id. Итог для пары пользователь-игрок - последнее изменение в
+    журнале, так что повторное применение ничего не портит, а запоздавшая
+    запись из окна не теряется.
+
+    Раз в settings.SUBSCRIPTION_INDEX_RELOAD секунд и при смене базы индекс
+    загружается заново: так подтягиваются подписки, записанные в обход
+    журнала, и не теряются изменения из уже удалённых записей журнала.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: dict[int, set[int]] = defaultdict(set)
+        # id последней применённой записи журнала, None - индекс не загружен
+        self.version: int | None = None
+        self._bind = None
+        self._loaded_at = 0.0
+
+    def refresh(self, session: Session) -> None:
+        with self._lock:
+            bind = session.get_bind()
+            age = time.monotonic() - self._loaded_at
+            if (
+                self.version is None
+                or bind is not self._bind
+                or age > settings.SUBSCRIPTION_INDEX_RELOAD
+            ):
+                self._load(session)
+                self._bind = bind
+                return
+            changes = (
+                session.query(
+                    DBSubscriptionChange.id,
+                    DBSubscriptionChange.user_id,
+                    DBSubscriptionChange.player_id,
+                    DBSubscriptionChange.added,
+                )
+                .filter(
+                    DBSubscriptionChange.id
+                    > self.version - settings.SUBSCRIPTION_INDEX_OVERLAP
+                )
+                .order_by(DBSubscriptionChange.id)
+                .all()
+            )
+            for _, user_id, player_id, added in changes:
+                self._apply(user_id, player_id, added)
+            if changes and changes[-1][0] > self.version:
+                logger.debug(
+                    'Subscription index: version %s -> %s',
+                    self.version,
+                    changes[-1][0],
+                )
+                self.version = changes[-1][0]
+
+    def _load(self, session: Session) -> None:
+        # Версия читается до снимка: изменения, сделанные во время чтения,
+        # применятся при следующем refresh
+        version = session.query(sa.func.max(DBSubscriptionChange.id)).scalar() or 0
+        users = defaultdict(set)
+        for user_id, player_id in session.query(
+            DBSubscription.user_id, DBSubscription.player_id
+        ):
+            users[player_id].add(user_id)
+        self._users = users
+        self.version = version
+        self._loaded_at = time.monotonic()
+        logger.info('Subscription index loaded: %s players', len(users))
+
+    def _apply(self, user_id: int, player_id: int, added: bool) -> None:
+        if added:
+            self._users[player_id].add(user_id)
+            return
+        users = self._users.get(player_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._users[player_id]
+
+    def get_users(self, player_id: int) -> set[int]:
+        with self._lock:
+            return set(self._users.get(player_id, ()))
+
+    def get_players(self) -> set[int]:
+        with self._lock:
+            return set(self._users)
+
+    def to_dict(self) -> dict[int, list[int]]:
+        with self._lock:
+            return {
+                player_id: sorted(users) for player_id, users in self._users.items()
+            }
@@ -5,9 +5,17 @@ import sqlalchemy as sa
 
 import utils.settings as settings_mod
 from bot.notifications import send_player_update
-from db.models import Base, DBSubscription, DBTournament, DBUserConfig
+from db.models import (
+    Base,
+    DBPlayerTournament,
+    DBSubscription,
+    DBTournament,
+    DBUserConfig,
+)
 from db.session_factory import SessionLocal
+from parsers.tournament_parser import TournamentParser
 from services.player_service import PlayerService
+from services.refresh_policy import AdaptiveRefreshPolicy, FixedRefreshPolicy
 
 # Override DB settings for testing (using in-memory SQLite)
 TEST_DATABASE_URL = 'sqlite:///:memory:'
@@ -165,6 +173,7 @@ def test_process_batch_and_notify():
 
     now = datetime.datetime(2025, 4, 12, 23, 0, 0)
     service = TournamentPlayerService()
+    service.refresh_policy = FixedRefreshPolicy()
     service.process_batch_and_notify(batch_size=10, now=now)
     assert (
         len(service.messages) == 3
@@ -180,3 +189,291 @@ def test_process_batch_and_notify():
         )
         expected = datetime.datetime(2025, 4, 12, 23, 0, 0).timestamp() + 7200
         assert abs(tournament.next_update_dtm - expected) < 1.0
+
+
+def test_failed_notification_does_not_stop_batch():
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    with SessionLocal() as session:
+        session.add(DBUserConfig(id=1, config={}))
+        session.add_all(
+            [
+                DBSubscription(user_id=1, player_id=124031),
+                DBSubscription(user_id=1, player_id=84962),
+            ]
+        )
+        session.add(
+            DBTournament(
+                id=168138,
+                tournament_date=datetime.date(2025, 4, 5),
+                info_json='{}',
+                next_update_dtm=datetime.datetime(2025, 4, 12, 22, 0, 0).timestamp(),
+            )
+        )
+        session.commit()
+
+    class BlockedOnceService(TournamentPlayerService):
+        failed = False
+
+        def _send_player_update(self, user_id, info):
+            if not self.failed:
+                self.failed = True
+                raise RuntimeError('Forbidden: bot was blocked by the user')
+            super()._send_player_update(user_id, info)
+
+    service = BlockedOnceService()
+    service.refresh_policy = FixedRefreshPolicy()
+    updates = service.process_batch_and_notify(
+        batch_size=10, now=datetime.datetime(2025, 4, 12, 23, 0, 0)
+    )
+    # Первая нотификация упала, остальные дошли
+    assert service.failed
+    assert service.messages
+    assert len(service.messages) == len(updates) - 1
+
+
+def test_unchanged_tournament_is_not_parsed(monkeypatch):
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    with SessionLocal() as session:
+        session.add(
+            DBTournament(
+                id=168577,
+                tournament_date=datetime.date(2025, 4, 13),
+                info_json='{}',
+            )
+        )
+        session.commit()
+
+    players = [124031, 107011]
+    service = TournamentPlayerService()
+    updated, is_ok = service._update_player_tournaments(players, 168577)
+    assert is_ok
+    assert set(updated.keys()) == {124031, 107011}
+
+    # Страница не изменилась: парсинг не должен вызываться
+    def fail_parse(page):
+        raise AssertionError('Unchanged page must not be parsed')
+
+    monkeypatch.setattr(TournamentParser, 'parse_data', fail_parse)
+    updated, is_ok = service._update_player_tournaments(players, 168577)
+    assert is_ok
+    assert updated == {}
+
+    # Новый подписчик сбрасывает отпечаток, и турнир разбирается заново
+    monkeypatch.undo()
+    with SessionLocal() as session:
+        DBTournament.set_tournaments_update_dtm_by_player(
+            session, 107011, datetime.datetime(2025, 4, 12, 23, 0, 0)
+        )
+        session.commit()
+    with SessionLocal() as session:
+        session.query(DBPlayerTournament).delete()
+        session.commit()
+    updated, is_ok = service._update_player_tournaments(players, 168577)
+    assert set(updated.keys()) == {124031, 107011}
+
+
+def test_player_tournaments_diff_in_bulk(statement_counter):
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    with SessionLocal() as session:
+        session.add(
+            DBTournament(
+                id=168138,
+                tournament_date=datetime.date(2025, 4, 5),
+                info_json='{}',
+            )
+        )
+        session.commit()
+
+    players = [124031, 84962, 107011]
+    service = TournamentPlayerService()
+    updated, _ = service._update_player_tournaments(players, 168138)
+    assert set(updated.keys()) == {124031, 84962}
+
+    # Одна запись устарела, другая совпадает со страницей
+    with SessionLocal() as session:
+        session.query(DBPlayerTournament).filter_by(player_id=84962).update(
+            {DBPlayerTournament.info_json: '{}'}
+        )
+        session.query(DBTournament).update({DBTournament.fingerprint: None})
+        session.commit()
+
+    with statement_counter(engine) as statements:
+        updated, is_ok = service._update_player_tournaments(players, 168138)
+    assert is_ok
+    assert set(updated.keys()) == {84962}
+    with SessionLocal() as session:
+        row = session.query(DBPlayerTournament).filter_by(player_id=84962).one()
+        assert row.info_json == updated[84962].serialize()
+    # Проверка отпечатка, обновление турнира, чтение участников турнира,
+    # чтение участий, пачка обновлений
+    assert len(statements) == 5
+
+
+def test_adaptive_refresh_and_budget(monkeypatch):
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    with SessionLocal() as session:
+        session.add(DBUserConfig(id=1, config={}))
+        session.add(DBSubscription(user_id=1, player_id=124031))
+        for tournament_id, tournament_date in (
+            (168138, datetime.date(2025, 4, 5)),
+            (168577, datetime.date(2025, 4, 13)),
+        ):
+            session.add(
+                DBTournament(
+                    id=tournament_id,
+                    tournament_date=tournament_date,
+                    info_json='{}',
+                    next_update_dtm=datetime.datetime(2025, 4, 12, 22).timestamp(),
+                )
+            )
+        session.commit()
+
+    monkeypatch.setattr(settings_mod.settings, 'REFRESH_BUDGET_PER_HOUR', 1)
+    now = datetime.datetime(2025, 4, 12, 23, 0, 0)
+    service = TournamentPlayerService()
+    service.refresh_policy = AdaptiveRefreshPolicy()
+    service.process_batch_and_notify(batch_size=10, now=now)
+    with SessionLocal() as session:
+        processed = (
+            session.query(DBTournament)
+            .filter(DBTournament.last_update_dtm.isnot(None))
+            .count()
+        )
+    assert processed == 1
+
+    # Бюджет на час исчерпан
+    service.process_batch_and_notify(batch_size=10, now=now)
+    monkeypatch.setattr(settings_mod.settings, 'REFRESH_BUDGET_PER_HOUR', 0)
+    service.process_batch_and_notify(batch_size=10, now=now)
+    with SessionLocal() as session:
+        old = session.query(DBTournament).filter_by(id=168138).one()
+        upcoming = session.query(DBTournament).filter_by(id=168577).one()
+        assert old.next_update_dtm is None
+        # Турнир через час, за подписанным игроком следят: чаще, чем раз в 2 часа
+        assert now.timestamp() < upcoming.next_update_dtm < now.timestamp() + 3600
+        assert upcoming.priority > 1
+
+
+def test_budget_counts_refreshes_not_tournaments(monkeypatch):
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    now = datetime.datetime(2025, 4, 12, 23, 0, 0)
+    with SessionLocal() as session:
+        session.add(
+            DBTournament(
+                id=168577,
+                tournament_date=datetime.date(2025, 4, 13),
+                info_json='{}',
+                next_update_dtm=now.timestamp() - 60,
+            )
+        )
+        session.commit()
+
+    monkeypatch.setattr(settings_mod.settings, 'REFRESH_BUDGET_PER_HOUR', 2)
+    service = TournamentPlayerService()
+    service.refresh_policy = FixedRefreshPolicy()
+    refreshed = []
+    for minute in range(3):
+        moment = now + datetime.timedelta(minutes=minute)
+        with SessionLocal() as session:
+            # Турнир снова просрочен, как при минимальном интервале политики
+            session.query(DBTournament).update(
+                {DBTournament.next_update_dtm: moment.timestamp() - 1}
+            )
+            session.commit()
+        service.process_batch_and_notify(batch_size=10, now=moment)
+        with SessionLocal() as session:
+            tournament = session.query(DBTournament).one()
+            refreshed.append(tournament.last_update_dtm == int(moment.timestamp()))
+    # Один и тот же турнир расходует бюджет на каждой обработке
+    assert refreshed == [True, True, False]
+
+
+def test_unchanged_batch_loads_players_once(statement_counter):
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    with open('htmls/2025-04-12/tournament/168577.html', 'r') as f:
+        page = f.read()
+    now = datetime.datetime(2025, 4, 12, 23, 0, 0)
+    with SessionLocal() as session:
+        for tournament_id in (1, 2, 3):
+            tournament = DBTournament(
+                id=tournament_id,
+                tournament_date=datetime.date(2025, 4, 13),
+                info_json='{}',
+                fingerprint=TournamentParser.get_fingerprint(page),
+                next_update_dtm=now.timestamp() - 60,
+            )
+            tournament.set_players([124031, tournament_id])
+            session.add(tournament)
+        session.commit()
+
+    class SamePageService(TournamentPlayerService):
+        def _get_tournament_page(self, tournament_id):
+            return page
+
+    service = SamePageService()
+    service.refresh_policy = FixedRefreshPolicy()
+    with statement_counter(engine) as statements:
+        service.process_batch_and_notify(batch_size=10, now=now)
+    # Участники всех неизменившихся турниров читаются одним запросом
+    assert len([s for s in statements if 'FROM tournament_players' in s]) == 1
+
+
+def test_batch_skips_failed_and_unchanged_pages(monkeypatch):
+    engine = sa.create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    now = datetime.datetime(2025, 4, 12, 23, 0, 0)
+    with SessionLocal() as session:
+        for tournament_id in (168577, 999):
+            session.add(
+                DBTournament(
+                    id=tournament_id,
+                    tournament_date=datetime.date(2025, 4, 13),
+                    info_json='{}',
+                    next_update_dtm=now.timestamp() - 60,
+                )
+            )
+        session.commit()
+
+    class BrokenPageService(TournamentPlayerService):
+        def _get_tournament_page(self, tournament_id):
+            if tournament_id == 999:
+                return '<html>not a tournament</html>'
+            return super()._get_tournament_page(tournament_id)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Writer must not re-check or re-parse pages')
+
+    monkeypatch.setattr(PlayerService, '_is_unchanged', fail)
+    service = BrokenPageService()
+    service.refresh_policy = FixedRefreshPolicy()
+    service.process_batch_and_notify(batch_size=10, now=now)
+    with SessionLocal() as session:
+        broken = session.query(DBTournament).filter_by(id=999).one()
+        # Неразобранная страница пропущена и вернётся после аренды
+        assert broken.last_update_dtm is None
+        assert broken.next_update_dtm > now.timestamp()
+        session.query(DBTournament).update(
+            {DBTournament.next_update_dtm: now.timestamp() - 1}
+        )
+        session.commit()
+
+    # Страница не изменилась: ни разбора, ни чтения отпечатка писателем
+    monkeypatch.setattr(TournamentParser, 'parse_data', fail)
+    later = now + datetime.timedelta(minutes=1)
+    service.process_batch_and_notify(batch_size=10, now=later)
+    with SessionLocal() as session:
+        tournament = session.query(DBTournament).filter_by(id=168577).one()
+        assert tournament.last_update_dtm == int(later.timestamp())
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from services.refresh_policy import (
+    AdaptiveRefreshPolicy,
+    FixedRefreshPolicy,
+    RefreshPolicy,
+    RefreshSignals,
+    get_refresh_policy,
+    update_change_rate,
+)
+
+NOW = datetime.datetime(2025, 4, 12, 12, 0)
+
+
+def signals(start, watchers=1, change_rate=0.5, is_completed=False):
+    return RefreshSignals(NOW, start, watchers, change_rate, is_completed)
+
+
+def interval(refresh):
+    return refresh.next_update_dtm - NOW.timestamp()
+
+
+def test_fixed_policy():
+    policy = FixedRefreshPolicy()
+    refresh = policy.schedule(signals(NOW))
+    assert interval(refresh) == 7200
+    old = NOW - datetime.timedelta(days=3)
+    assert policy.schedule(signals(old)).next_update_dtm is None
+
+
+def test_adaptive_policy():
+    policy = AdaptiveRefreshPolicy()
+    soon = policy.schedule(signals(NOW + datetime.timedelta(hours=3)))
+    later = policy.schedule(signals(NOW + datetime.timedelta(days=4)))
+    unwatched = policy.schedule(
+        signals(NOW + datetime.timedelta(hours=3), watchers=0)
+    )
+    running = policy.schedule(signals(NOW - datetime.timedelta(hours=1)))
+    assert interval(running) < interval(soon) < interval(later)
+    assert interval(soon) < interval(unwatched)
+    assert running.priority > soon.priority > unwatched.priority
+
+    # Результаты есть, никто не следит - больше не обновляем
+    done = signals(NOW - datetime.timedelta(hours=5), watchers=0, is_completed=True)
+    assert policy.schedule(done).next_update_dtm is None
+    old = signals(NOW - datetime.timedelta(days=3))
+    assert policy.schedule(old).next_update_dtm is None
+
+
+def test_change_rate():
+    rate = update_change_rate(None, True)
+    assert 0.5 < rate < 1
+    for _ in range(20):
+        rate = update_change_rate(rate, False)
+    assert rate < 0.01
+
+
+def test_policy_without_schedule_is_abstract():
+    class Incomplete(RefreshPolicy):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert isinstance(get_refresh_policy('adaptive'), AdaptiveRefreshPolicy)
+    with pytest.raises(ValueError):
+        get_refresh_policy('unknown')
@@ -0,0 +1,77 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from db.models import Base, DBSubscription, DBSubscriptionChange
+from services.subscription_index import SubscriptionIndex
+from utils.models import UserConfig
+
+
+def test_index_follows_subscription_changes(statement_counter):
+    engine = sa.create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    index = SubscriptionIndex()
+    with Session(engine) as session:
+        # Подписка, записанная до загрузки индекса, попадает в снимок
+        session.add(DBSubscription(user_id=1, player_id=100))
+        session.commit()
+        index.refresh(session)
+        assert index.to_dict() == {100: [1]}
+        version = index.version
+
+        DBSubscription.process_subs_diff(
+            session,
+            UserConfig(id=2),
+            UserConfig(id=2, friend_ids={100, 200}, subscription_on=True),
+        )
+        DBSubscription.process_subs_diff(
+            session,
+            UserConfig(id=1, friend_ids={100}, subscription_on=True),
+            UserConfig(id=1, friend_ids={300}, subscription_on=True),
+        )
+        session.commit()
+
+        with statement_counter(engine) as statements:
+            index.refresh(session)
+
+        # Догоняет по журналу одним запросом, не перечитывая subscriptions
+        assert len(statements) == 1
+        assert 'subscriptions ' not in statements[0]
+        assert index.version > version
+        assert index.to_dict() == {100: [2], 200: [2], 300: [1]}
+        assert index.get_users(300) == {1}
+        assert index.get_users(400) == set()
+
+        DBSubscription.process_subs_diff(
+            session,
+            UserConfig(id=2, friend_ids={100, 200}, subscription_on=True),
+            UserConfig(id=2, friend_ids={100, 200}),
+        )
+        session.commit()
+        index.refresh(session)
+        assert index.get_players() == {300}
+
+
+def test_index_picks_up_late_committed_change():
+    engine = sa.create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    index = SubscriptionIndex()
+    with Session(engine) as session:
+        index.refresh(session)
+        # id 2 закоммичен раньше id 1, как бывает с sequence в Postgres
+        session.add(
+            DBSubscriptionChange(
+                id=2, user_id=1, player_id=100, added=True, created_at=0
+            )
+        )
+        session.commit()
+        index.refresh(session)
+        assert index.version == 2
+        session.add(
+            DBSubscriptionChange(
+                id=1, user_id=2, player_id=200, added=True, created_at=0
+            )
+        )
+        session.commit()
+        index.refresh(session)
+        assert index.to_dict() == {100: [1], 200: [2]}
+        assert index.version == 2
@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+
+from services.worker import Job, Worker
+from utils.job_lock import job_lock
+from utils.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'JOB_LOCK_DIR', str(tmp_path))
+
+
+def test_jobs_run_on_schedule():
+    calls = []
+    worker = Worker(
+        [
+            Job('discovery', lambda: calls.append('discovery'), 3600, hours={8, 12}),
+            Job('batch', lambda: calls.append('batch'), 60),
+        ]
+    )
+    assert worker.run_pending(datetime.datetime(2025, 4, 12, 8, 0)) == [
+        'discovery',
+        'batch',
+    ]
+    # Интервал ещё не прошёл, а в 9 часов discovery не запускается
+    assert worker.run_pending(datetime.datetime(2025, 4, 12, 8, 1)) == []
+    worker.jobs[1].last_run -= 60
+    assert worker.run_pending(datetime.datetime(2025, 4, 12, 9, 0)) == ['batch']
+    assert calls == ['discovery', 'batch', 'batch']
+
+
+def test_failed_job_does_not_stop_worker():
+    def failing():
+        raise RuntimeError('RTTF is down')
+
+    calls = []
+    worker = Worker([Job('failing', failing, 60), Job('ok', lambda: calls.append(1), 60)])
+    assert worker.run_pending() == ['failing', 'ok']
+    assert calls == [1]
+
+
+def test_overlapping_run_is_skipped():
+    calls = []
+    worker = Worker([Job('batch', lambda: calls.append(1), 60)])
+    with job_lock('batch') as acquired:
+        assert acquired
+        worker.run_pending()
+    assert calls == []
+    worker.jobs[0].last_run = None
+    worker.run_pending()
+    assert calls == [1]
+
+
+def test_non_exclusive_job_runs_alongside_other_processes():
+    calls = []
+    worker = Worker([Job('batch', lambda: calls.append(1), 60, exclusive=False)])
+    with job_lock('batch') as acquired:
+        assert acquired
+        worker.run_pending()
+    assert calls == [1]
+
+
+def test_stopped_worker_runs_nothing():
+    calls = []
+    worker = Worker([Job('batch', lambda: calls.append(1), 60)])
+    worker.stop()
+    worker.run()
+    assert calls == []
@@ -0,0 +1,105 @@
+import datetime
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from parsers.parse_pool import ParsePool
+from utils.custom_logger import logger
+from utils.job_lock import job_lock
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], object]
+    # Минимум секунд между запусками
+    interval: float
+    # Часы, в которые задача запускается, None - круглосуточно
+    hours: set[int] | None = None
+    # time.monotonic() начала последнего запуска
+    last_run: float | None = None
+    # True - не запускать, пока задача идёт в другом процессе (job_lock).
+    # Батч обновлений турниров берёт турниры в аренду и может идти в
+    # нескольких процессах параллельно
+    exclusive: bool = True
+
+    def is_due(self, now: datetime.datetime, monotonic_now: float) -> bool:
+        if self.hours is not None and now.hour not in self.hours:
+            return False
+        return self.last_run is None or monotonic_now - self.last_run >= self.interval
+
+
+class Worker:
+    """Долгоживущий процесс вместо запусков main.py из крона.
+
+    Задачи выполняются по очереди в одном процессе, поэтому между запусками
+    остаются тёплыми http соединения, кэш страниц, пул парсинга и соединения
+    с базой. Задача, не успевшая закончиться к следующему сроку, просто
+    запускается позже. Одновременный запуск exclusive-задачи в другом
+    процессе (второй воркер, старый крон) отсекается через job_lock, задачи
+    без exclusive можно запускать в нескольких воркерах параллельно.
+
+    SIGTERM и SIGINT дают доработать текущей задаче, новые не запускаются.
+    """
+
+    def __init__(self, jobs: list[Job], tick: float = 1.0):
+        self.jobs = jobs
+        self.tick = tick
+        self._stopped = threading.Event()
+
+    def stop(self, *args) -> None:
+        logger.info('Worker is stopping')
+        self._stopped.set()
+
+    def run_pending(self, now: datetime.datetime | None = None) -> list[str]:
+        """Запускает задачи, срок которых наступил. Возвращает их имена"""
+        if now is None:
+            now = datetime.datetime.now()
+        started = []
+        for job in self.jobs:
+            if self._stopped.is_set():
+                break
+            if job.is_due(now, time.monotonic()):
+                self._run_job(job)
+                started.append(job.name)
+        return started
+
+    def run(self) -> None:
+        previous_handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        logger.info('Worker started with jobs %s', [job.name for job in self.jobs])
+        try:
+            while not self._stopped.is_set():
+                self.run_pending()
+                self._stopped.wait(self.tick)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            ParsePool.shutdown()
+            logger.info('Worker finished')
+
+    def _run_job(self, job: Job) -> None:
+        job.last_run = time.monotonic()
+        if not job.exclusive:
+            self._call_job(job)
+            return
+        with job_lock(job.name) as acquired:
+            if not acquired:
+                logger.warning('Job %s is already running elsewhere', job.name)
+                return
+            self._call_job(job)
+
+    def _call_job(self, job: Job) -> None:
+        try:
+            job.func()
+        except Exception:
+            # Упавшая задача не останавливает воркер, следующий запуск по сроку
+            logger.exception('Job %s failed', job.name)
+        finally:
+            logger.info(
+                'Job %s finished in %.1fs', job.name, time.monotonic() - job.last_run
+            )
@@ -0,0 +1,27 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from utils.settings import settings
+
+
+@contextmanager
+def job_lock(name: str) -> Iterator[bool]:
+    """Не даёт одной и той же задаче идти в двух процессах одновременно.
+
+    Блокировка - fcntl.flock на файле в settings.JOB_LOCK_DIR, её видят и
+    воркер, и запуски из крона. Не ждёт: отдаёт False, если задача уже идёт.
+    Блокировка снимается и при падении процесса.
+    """
+    os.makedirs(settings.JOB_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(settings.JOB_LOCK_DIR, f'{name}.lock'), 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -4,8 +4,13 @@ from dataclasses import dataclass, field
 from typing import Any
 
 from utils.custom_logger import logger
+from utils.settings import settings
 import json
 
+# Проверки типов в __post_init__. В горячих путях (парсинг больших пачек)
+# можно выключить через settings.MODEL_VALIDATION или подменой этого флага
+VALIDATE = settings.MODEL_VALIDATION
+
 
 class StateMachine(enum.Enum):
     MAIN = 'main_state'
@@ -83,7 +88,7 @@ class DateRange:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     id: int
     name: str
@@ -105,7 +110,7 @@ class Player:
         )
 
     def __post_init__(self):
-        if not isinstance(self.id, int):
+        if VALIDATE and not isinstance(self.id, int):
             raise TypeError(
                 f'Invalid type for id: expected int, got {type(self.id).__name__}'
             )
@@ -140,7 +145,7 @@ class Player:
         # Join non-empty strings with new lines
         return '\n'.join(filter(bool, md_representation))
 
-@dataclass
+@dataclass(slots=True)
 class PlayerResult:
     player_id: int
     name: str
@@ -155,7 +160,7 @@ class PlayerResult:
             f'[{self.player_id}](https://m.rttf.ru/players/{self.player_id}): *{self.name}*'
             f' rating:{self.rating_before:.0f} delta:{self.rating_delta} won:{self.games_won} lost:{self.games_lost}')
 
-@dataclass
+@dataclass(slots=True)
 class Tournament:
     id: int
     name: str
@@ -164,9 +169,13 @@ class Tournament:
     registered_players: list[Player] = field(default_factory=list)
     refused_players: list[Player] = field(default_factory=list)
     player_results: list[PlayerResult] = field(default_factory=list)
+    # id всех записавшихся и снявшихся, даже если парсились не все игроки
+    player_ids: list[int] = field(default_factory=list)
+    # id снявшихся, подмножество player_ids
+    refused_ids: list[int] = field(default_factory=list)
 
     def __post_init__(self):
-        if not isinstance(self.id, int):
+        if VALIDATE and not isinstance(self.id, int):
             raise TypeError(
                 f'Invalid type for id: expected int, got {type(self.id).__name__}'
             )
@@ -174,6 +183,13 @@ class Tournament:
     def __repr__(self):
         return f'Tournament(' f'id={self.id}, ' f'name={self.name}' f')'
 
+    def get_player_statuses(self) -> dict[int, str]:
+        """Статус каждого участника: registered, refused или completed"""
+        status = 'completed' if self.is_completed else 'registered'
+        statuses = dict.fromkeys(self.player_ids, status)
+        statuses.update(dict.fromkeys(self.refused_ids, 'refused'))
+        return statuses
+
     def to_md(self):
         registered_players_representation = (
             '\n'.join(map(Player.to_md_one_str, self.registered_players))  # noqa
@@ -200,7 +216,7 @@ class Tournament:
         return res
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerTournamentInfo:
     player_id: int
     tournament_id: int
@@ -214,7 +230,11 @@ class PlayerTournamentInfo:
     games_lost: int = 0
 
     def serialize(self) -> str:
-        return json.dumps(self.__dict__, sort_keys=True)
+        # У slots-классов нет __dict__, поля берутся из __slots__.
+        # Ключи сортируются, поэтому строка та же, что и раньше
+        return json.dumps(
+            {name: getattr(self, name) for name in self.__slots__}, sort_keys=True
+        )
 
     @classmethod
     def deserialize(cls, data: str) -> "PlayerTournamentInfo":
@@ -0,0 +1,202 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+# Конец входа, проходит по очередям за последним элементом
+_DONE = object()
+# Как часто заблокированные потоки проверяют, не остановлен ли конвейер
+_POLL_INTERVAL = 0.1
+
+
+@dataclass(slots=True)
+class StageStats:
+    items: int = 0
+    # Секунды внутри функции стадии, сумма по потокам
+    busy: float = 0.0
+    # Секунды ожидания места в следующей очереди (backpressure)
+    blocked: float = 0.0
+
+    def __str__(self):
+        return f'items={self.items} busy={self.busy:.2f}s blocked={self.blocked:.2f}s'
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.stats = StageStats()
+
+
+class Pipeline:
+    """Цепочка стадий, соединённых ограниченными очередями.
+
+    Каждая стадия работает в своих потоках (stage.workers) и берёт элементы из
+    очереди предыдущей. Очереди ограничены queue_size: быстрая стадия ждёт
+    медленную, и пропускная способность определяется самой медленной стадией,
+    а не суммой всех. Если стадия вернула None, элемент дальше не идёт.
+    Порядок элементов между стадиями не сохраняется.
+
+    Первое исключение в любой стадии останавливает конвейер и пробрасывается
+    из put(), results() и join(). Если результаты не читаются, последняя
+    стадия должна возвращать None, иначе её очередь переполнится.
+
+    Использование:
+        stages = [Stage('fetch', fetch, workers=5), Stage('parse', parse)]
+        with Pipeline(stages) as pipeline:
+            pipeline.feed(ids)
+            for result in pipeline.results():
+                ...
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 8):
+        self.stages = stages
+        self._queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+        self._alive = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._error: BaseException | None = None
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+        self._fed = False
+
+    def __enter__(self) -> 'Pipeline':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.stop()
+            self.join(raise_error=False)
+            return
+        # После feed() вход закрывает поток-подавальщик
+        if not self._fed:
+            self.close()
+        self.join()
+
+    def start(self) -> None:
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                self._start_thread(f'{stage.name}-{number}', self._work, index)
+
+    def feed(self, items: Iterable[Any]) -> None:
+        """Подаёт элементы на вход из отдельного потока и закрывает вход"""
+
+        def feeder():
+            try:
+                for item in items:
+                    if not self._put(self._queues[0], item):
+                        return
+            except BaseException as e:
+                self._fail(e)
+                return
+            self.close()
+
+        self._fed = True
+        self._start_thread('feeder', feeder)
+
+    def put(self, item: Any) -> None:
+        if not self._put(self._queues[0], item):
+            self._raise_error()
+
+    def close(self) -> None:
+        """Больше элементов не будет"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._put(self._queues[0], _DONE)
+
+    def stop(self) -> None:
+        """Останавливает все стадии, необработанные элементы теряются"""
+        self._stopped.set()
+
+    def results(self) -> Iterator[Any]:
+        while True:
+            item = self._get(self._queues[-1])
+            if item is _DONE:
+                break
+            yield item
+        self._raise_error()
+
+    def join(self, raise_error: bool = True) -> None:
+        for thread in self._threads:
+            thread.join()
+        if raise_error:
+            self._raise_error()
+
+    def get_stats(self) -> dict[str, StageStats]:
+        with self._lock:
+            return {
+                stage.name: StageStats(
+                    stage.stats.items, stage.stats.busy, stage.stats.blocked
+                )
+                for stage in self.stages
+            }
+
+    def _start_thread(self, name: str, target: Callable, *args) -> None:
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _fail(self, error: BaseException) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self.stop()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """False, если конвейер остановлен"""
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stopped.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        input_queue, output_queue = self._queues[index], self._queues[index + 1]
+        while True:
+            item = self._get(input_queue)
+            if item is _DONE:
+                # Возвращаем маркер соседним потокам стадии, последний из них
+                # передаёт его следующей стадии
+                self._put(input_queue, _DONE)
+                with self._lock:
+                    self._alive[index] -= 1
+                    is_last = self._alive[index] == 0
+                if is_last:
+                    self._put(output_queue, _DONE)
+                return
+
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except BaseException as e:
+                self._fail(e)
+                return
+            busy = time.perf_counter() - start
+
+            blocked_start = time.perf_counter()
+            if result is not None and not self._put(output_queue, result):
+                return
+            with self._lock:
+                stage.stats.items += 1
+                stage.stats.busy += busy
+                stage.stats.blocked += time.perf_counter() - blocked_start
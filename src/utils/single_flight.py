@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """Схлопывает одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов (лидер) выполняет функцию, остальные, пришедшие пока она
+    выполняется, ждут и получают тот же результат или то же исключение.
+    Работает между потоками и между event loop'ами: ожидание идёт через
+    concurrent.futures.Future.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _claim(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        future, is_leader = self._claim(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    def do_many(
+        self, keys: Sequence[Hashable], func: Callable[[list[Hashable]], list[T]]
+    ) -> list[T]:
+        """do для пачки ключей. func вызывается один раз со списком ключей,
+        по которым этот вызов - лидер, и возвращает результаты в том же
+        порядке. По остальным ключам ждём чужих лидеров. Повторы ключей
+        внутри пачки тоже выполняются один раз"""
+        claims: dict[Hashable, tuple[Future, bool]] = {}
+        for key in keys:
+            if key not in claims:
+                claims[key] = self._claim(key)
+        lead = [key for key, (_, is_leader) in claims.items() if is_leader]
+        try:
+            results = func(lead) if lead else []
+        except BaseException as e:
+            for key in lead:
+                claims[key][0].set_exception(e)
+            raise
+        else:
+            for key, result in zip(lead, results):
+                claims[key][0].set_result(result)
+        finally:
+            for key in lead:
+                self._finish(key, claims[key][0])
+        return [claims[key][0].result() for key in keys]
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        future, is_leader = self._claim(key)
+        if not is_leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {'leaders': self.leaders, 'followers': self.followers}
@@ -0,0 +1,27 @@
+import pytest
+
+from utils import models
+from utils.models import Player, PlayerTournamentInfo
+
+
+def test_player_tournament_info_serialize():
+    info = PlayerTournamentInfo(
+        3, 4, 'completed', 'Иван', 'Турнир', 512.3, -4.5, 507.8, 3, 1
+    )
+    serialized = info.serialize()
+    # Строка должна совпадать с сохранёнными до перехода на __slots__
+    assert serialized == (
+        '{"games_lost": 1, "games_won": 3, "player_id": 3, '
+        '"player_name": "\\u0418\\u0432\\u0430\\u043d", "rating_after": 507.8, '
+        '"rating_before": 512.3, "rating_delta": -4.5, "status": "completed", '
+        '"tournament_id": 4, '
+        '"tournament_name": "\\u0422\\u0443\\u0440\\u043d\\u0438\\u0440"}'
+    )
+    assert PlayerTournamentInfo.deserialize(serialized) == info
+
+
+def test_validation_switch(monkeypatch):
+    with pytest.raises(TypeError):
+        Player('1', 'name')
+    monkeypatch.setattr(models, 'VALIDATE', False)
+    assert Player('1', 'name').id == '1'
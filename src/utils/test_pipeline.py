@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from utils.pipeline import Pipeline, Stage
+
+
+def test_results_pass_all_stages():
+    stages = [
+        Stage('double', lambda x: x * 2, workers=3),
+        Stage('odd_only', lambda x: x if x % 4 else None, workers=2),
+    ]
+    with Pipeline(stages, queue_size=2) as pipeline:
+        pipeline.feed(range(100))
+        results = list(pipeline.results())
+    assert sorted(results) == [x * 2 for x in range(100) if x * 2 % 4]
+    stats = pipeline.get_stats()
+    assert stats['double'].items == 100
+    assert stats['odd_only'].items == 100
+
+
+def test_throughput_is_set_by_slowest_stage():
+    def slow(x):
+        time.sleep(0.02)
+        return x
+
+    stages = [Stage('fetch', slow, workers=4), Stage('parse', slow, workers=4)]
+    start = time.perf_counter()
+    with Pipeline(stages, queue_size=2) as pipeline:
+        pipeline.feed(range(40))
+        assert len(list(pipeline.results())) == 40
+    # Последовательно было бы 40 * 2 * 0.02 = 1.6 с
+    assert time.perf_counter() - start < 0.8
+
+
+def test_backpressure_bounds_in_flight_items():
+    fetched = []
+    release = threading.Event()
+
+    def fetch(x):
+        fetched.append(x)
+        return x
+
+    def blocked(x):
+        release.wait()
+
+    stages = [Stage('fetch', fetch), Stage('write', blocked)]
+    with Pipeline(stages, queue_size=2) as pipeline:
+        pipeline.feed(range(100))
+        time.sleep(0.3)
+        # Одна запись в работе, две в очереди, одна ждёт места у fetch
+        assert len(fetched) <= 4
+        release.set()
+    assert len(fetched) == 100
+
+
+def test_stage_error_stops_pipeline():
+    def failing(x):
+        if x == 5:
+            raise ValueError('broken page')
+        return x
+
+    with pytest.raises(ValueError, match='broken page'):
+        with Pipeline([Stage('parse', failing, workers=2)]) as pipeline:
+            pipeline.feed(range(1000))
+            list(pipeline.results())
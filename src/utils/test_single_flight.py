@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return object()
+
+    with ThreadPool(8) as pool:
+        results = pool.map(lambda _: single_flight.do('key', slow), range(8))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.get_stats() == {'leaders': 1, 'followers': 7}
+
+
+def test_sequential_calls_are_not_cached():
+    single_flight = SingleFlight()
+    assert single_flight.do('key', lambda: 1) == 1
+    assert single_flight.do('key', lambda: 2) == 2
+
+
+def test_exception_is_shared():
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    def follower():
+        started.wait()
+        return single_flight.do('key', failing)
+
+    with ThreadPool(2) as pool:
+        leader_result = pool.apply_async(single_flight.do, ('key', failing))
+        follower_result = pool.apply_async(follower)
+        with pytest.raises(ValueError):
+            leader_result.get()
+        with pytest.raises(ValueError):
+            follower_result.get()
+    assert single_flight.get_stats()['leaders'] == 1
+
+
+def test_async_follower_waits_for_thread_leader():
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.1)
+        return 'page'
+
+    async def never_called():
+        raise AssertionError('Follower must not execute the call')
+
+    async def follower():
+        await asyncio.to_thread(started.wait)
+        return await single_flight.do_async('key', never_called)
+
+    thread = threading.Thread(target=single_flight.do, args=('key', slow))
+    thread.start()
+    assert asyncio.run(follower()) == 'page'
+    thread.join()
+
+
+def test_do_many_shares_keys_in_flight():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    batches = []
+
+    def slow(keys):
+        batches.append(list(keys))
+        started.set()
+        release.wait()
+        return [key * 10 for key in keys]
+
+    with ThreadPool(2) as pool:
+        leader = pool.apply_async(single_flight.do_many, ([1, 2, 2], slow))
+        started.wait()
+        follower = pool.apply_async(single_flight.do_many, ([2, 3], slow))
+        # Второй вызов дошёл до ожидания ключа 2, ключ 3 разбирает сам
+        while len(batches) < 2:
+            time.sleep(0.01)
+        release.set()
+        assert leader.get() == [10, 20, 20]
+        assert follower.get() == [20, 30]
+    assert batches == [[1, 2], [3]]